@@ -61,10 +61,19 @@ import os
 import re
 import sys
 
+# shared build tools are kept in the BuildTools directory of the repository
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'BuildTools'))
+import AssetCache
+import ImageOptimizer
+import LazyTabs
+import SharedImages
+
 EmbedVideo = False
 if len(sys.argv)>1:
     EmbedVideo = 'EmbedVideo' in sys.argv[1:]
 
+LazyTabMode = 'EagerTabs' not in sys.argv[1:]
+
 ImageDir = 'Images'
 CommonResourceDir = 'https://jacob-barhak.github.io/CommonResources/'
 ExternalResourcesIMAG2019 = 'https://jacob-barhak.github.io/PosterIMAG2019Resources/'
@@ -73,17 +82,14 @@ ExternalResourcesIMAG2019 = 'https://jacob-barhak.github.io/PosterIMAG2019Resour
 
 def CovertFileToData(FileName):
     "Convert file to data that can be used in html"
-    DataFile = open(FileName,'rb')
-    Data = DataFile.read()
-    DataFile.close()
-    EncodedData=base64.b64encode(Data)
+    EncodedData = AssetCache.EncodeFile(FileName)
     return EncodedData
     
 
 def ConstractImageLinkAnchor(Link, ImageFileName, Text, Width):
-    'Constructs html to describe the png image and link it'
-    EncodedImage=  CovertFileToData (ImageDir+os.sep+ImageFileName)
-    RetStr = '<a title="%s" target="_blank" href="%s"><img src="data:image/png;base64,%s" alt="%s" width="%i"/> </a>'%(Text,Link,EncodedImage,Text,Width)
+    'Constructs html to describe the image and link it'
+    (ImageType, EncodedImage) = ImageOptimizer.EncodeImage(ImageDir+os.sep+ImageFileName, Width)
+    RetStr = '<a title="%s" target="_blank" href="%s"><img src="data:%s;base64,%s" alt="%s" width="%i"/> </a>'%(Text,Link,ImageType,EncodedImage,Text,Width)
     return RetStr
 
 
@@ -818,13 +824,14 @@ Section5 =  Section5SlideSelectorTab
 
 TitleHTML = 'AnacondaCon 2019 presentation by Jacob Barhak'
 
-SectionSelectorTab = panel.layout.Tabs (
+SectionSelectorTab = LazyTabs.Tabs (
                                         ('Preface',Section0),
                                         ('(1) ICU Data Visualization',Section1),
                                         ('(2) Modeling Populations',Section2),
                                         ('(3) The Reference Model',Section3),
                                         ('(4) ClinicalUnitMapping.com',Section4),
                                         ('(5) Summary',Section5),
+                                        lazy = LazyTabMode,
                                         )
                                         
                                         
@@ -837,6 +844,8 @@ DocumentForOutput = Presentation._get_root(BokehDocument)
 # since online resources were removed from the development version. 
 #Html = bokeh.embed.file_html(DocumentForOutput, bokeh.resources.CDN, TitleHTML)
 Html = bokeh.embed.file_html(DocumentForOutput, bokeh.resources.INLINE, TitleHTML)
+Html = LazyTabs.AddItemScripts(Html, Presentation)
+Html = SharedImages.DeduplicateImages(Html)
 
 
 OutFile = open('AnacondaCon_2019.html','w')
@@ -0,0 +1,223 @@
+###############################################################################
+# Copyright (C) 2024 Jacob Barhak
+#
+###############################################################################
+#
+# Feel free to contact the author
+# --
+# Jacob Barhak Ph.D.
+# jacob.barhak@gmail.com
+# http://sites.google.com/site/jacobbarhak/
+#
+#
+# Persistent content addressed cache of base64 encoded files.
+# Presentations embed images and videos as base64 data in html. The same
+# logos and QR codes are used by many presentations, so the encoded payload is
+# stored on disk under the content hash of the file and reused by all
+# presentations and all later builds. The file content is hashed only when its
+# size or time stamp changed. The cache is bounded in size and the least
+# recently used entries are evicted first.
+
+
+import base64
+import hashlib
+import io
+import json
+import os
+import collections
+
+BuildToolsDir = os.path.dirname(os.path.abspath(__file__))
+RepositoryDir = os.path.dirname(BuildToolsDir)
+DefaultCacheDir = os.environ.get('PRESENTATIONS_CACHE_DIR', os.path.join(RepositoryDir, 'BuildCache'))
+
+# maximal size of the encoded payloads kept on disk and in memory
+DefaultMaxDiskBytes = int(os.environ.get('PRESENTATIONS_ASSET_CACHE_BYTES', 1 << 30))
+DefaultMaxMemoryBytes = 64 << 20
+
+HashBlockSize = 1 << 20
+
+# streamed files are encoded in blocks of a multiple of 3 bytes so the base64
+# encodings of consecutive blocks can be concatenated
+EncodeBlockSize = 3 << 18
+
+
+def NativeString(Data):
+    'Returns ascii data as the native str type of this python version'
+    if isinstance(Data, str):
+        return Data
+    return Data.decode('ascii')
+
+
+def WriteFileAtomic(FileName, Data):
+    'Writes bytes to a file so that concurrent readers never see a partial file'
+    TempFileName = '%s.%i.tmp' % (FileName, os.getpid())
+    DataFile = io.open(TempFileName, 'wb')
+    DataFile.write(Data)
+    DataFile.close()
+    try:
+        os.rename(TempFileName, FileName)
+    except OSError:
+        # another process already stored the same entry
+        os.remove(TempFileName)
+
+
+class AssetCache(object):
+    'Size bounded least recently used cache of base64 encoded files'
+
+    def __init__(self, CacheDir=DefaultCacheDir, MaxDiskBytes=DefaultMaxDiskBytes, MaxMemoryBytes=DefaultMaxMemoryBytes):
+        self.PayloadDir = os.path.join(CacheDir, 'Assets')
+        self.PathDir = os.path.join(CacheDir, 'AssetPaths')
+        self.MaxDiskBytes = MaxDiskBytes
+        self.MaxMemoryBytes = MaxMemoryBytes
+        self.Memory = collections.OrderedDict()
+        self.MemoryBytes = 0
+        self.Hits = 0
+        self.Misses = 0
+        for DirName in (self.PayloadDir, self.PathDir):
+            if not os.path.isdir(DirName):
+                try:
+                    os.makedirs(DirName)
+                except OSError:
+                    # created by another build process
+                    pass
+
+    def FileHash(self, FileName):
+        'Returns the content hash of a file, hashing it only if it was modified'
+        AbsoluteFileName = os.path.abspath(FileName)
+        Status = os.stat(AbsoluteFileName)
+        PathKey = hashlib.sha256(AbsoluteFileName.encode('utf-8')).hexdigest()
+        PathRecordName = os.path.join(self.PathDir, PathKey + '.json')
+        if os.path.isfile(PathRecordName):
+            PathRecordFile = io.open(PathRecordName, 'r', encoding='utf-8')
+            try:
+                PathRecord = json.load(PathRecordFile)
+            except ValueError:
+                PathRecord = {}
+            PathRecordFile.close()
+            if PathRecord.get('Size') == Status.st_size and PathRecord.get('MTime') == Status.st_mtime:
+                return PathRecord['Hash']
+        Hash = hashlib.sha256()
+        DataFile = io.open(AbsoluteFileName, 'rb')
+        Block = DataFile.read(HashBlockSize)
+        while Block:
+            Hash.update(Block)
+            Block = DataFile.read(HashBlockSize)
+        DataFile.close()
+        PathRecord = {'Path': AbsoluteFileName, 'Size': Status.st_size, 'MTime': Status.st_mtime, 'Hash': Hash.hexdigest()}
+        WriteFileAtomic(PathRecordName, json.dumps(PathRecord).encode('utf-8'))
+        return PathRecord['Hash']
+
+    def EncodeFile(self, FileName):
+        'Returns the base64 encoding of the file content as a str'
+        Hash = self.FileHash(FileName)
+        if Hash in self.Memory:
+            self.Hits += 1
+            Payload = self.Memory.pop(Hash)
+            self.Memory[Hash] = Payload
+            return Payload
+        PayloadFileName = os.path.join(self.PayloadDir, Hash + '.b64')
+        if os.path.isfile(PayloadFileName):
+            self.Hits += 1
+            PayloadFile = io.open(PayloadFileName, 'rb')
+            Payload = NativeString(PayloadFile.read())
+            PayloadFile.close()
+            # the time stamp marks when the entry was last used
+            os.utime(PayloadFileName, None)
+        else:
+            self.Misses += 1
+            DataFile = io.open(FileName, 'rb')
+            Data = DataFile.read()
+            DataFile.close()
+            Payload = NativeString(base64.b64encode(Data))
+            WriteFileAtomic(PayloadFileName, Payload.encode('ascii'))
+            self.Evict()
+        self.Remember(Hash, Payload)
+        return Payload
+
+    def StreamEncodedFile(self, FileName, OutFile):
+        'Writes the base64 encoding of a file to a binary file block by block'
+        Hash = self.FileHash(FileName)
+        PayloadFileName = os.path.join(self.PayloadDir, Hash + '.b64')
+        if os.path.isfile(PayloadFileName):
+            self.Hits += 1
+            PayloadFile = io.open(PayloadFileName, 'rb')
+            Block = PayloadFile.read(EncodeBlockSize)
+            while Block:
+                OutFile.write(Block)
+                Block = PayloadFile.read(EncodeBlockSize)
+            PayloadFile.close()
+            os.utime(PayloadFileName, None)
+            return
+        self.Misses += 1
+        # the payload is stored in the cache while it is written
+        TempFileName = '%s.%i.tmp' % (PayloadFileName, os.getpid())
+        PayloadFile = io.open(TempFileName, 'wb')
+        DataFile = io.open(FileName, 'rb')
+        Block = DataFile.read(EncodeBlockSize)
+        while Block:
+            EncodedBlock = base64.b64encode(Block)
+            OutFile.write(EncodedBlock)
+            PayloadFile.write(EncodedBlock)
+            Block = DataFile.read(EncodeBlockSize)
+        DataFile.close()
+        PayloadFile.close()
+        try:
+            os.rename(TempFileName, PayloadFileName)
+        except OSError:
+            os.remove(TempFileName)
+        self.Evict()
+
+    def Remember(self, Hash, Payload):
+        'Keep a payload in memory, dropping the least recently used ones'
+        if len(Payload) > self.MaxMemoryBytes:
+            return
+        self.Memory[Hash] = Payload
+        self.MemoryBytes += len(Payload)
+        while self.MemoryBytes > self.MaxMemoryBytes:
+            (OldHash, OldPayload) = self.Memory.popitem(last=False)
+            self.MemoryBytes -= len(OldPayload)
+
+    def Evict(self):
+        'Remove least recently used payloads until the cache fits its size bound'
+        Entries = []
+        TotalBytes = 0
+        for FileName in os.listdir(self.PayloadDir):
+            if not FileName.endswith('.b64'):
+                continue
+            FullFileName = os.path.join(self.PayloadDir, FileName)
+            try:
+                Status = os.stat(FullFileName)
+            except OSError:
+                continue
+            Entries.append((Status.st_mtime, Status.st_size, FullFileName))
+            TotalBytes += Status.st_size
+        Entries.sort()
+        for (LastUsed, Size, FullFileName) in Entries:
+            if TotalBytes <= self.MaxDiskBytes:
+                break
+            try:
+                os.remove(FullFileName)
+            except OSError:
+                pass
+            TotalBytes -= Size
+
+
+SharedCache = None
+
+
+def GetSharedCache():
+    'Returns the asset cache shared by all presentations built by this process'
+    global SharedCache
+    if SharedCache is None:
+        SharedCache = AssetCache()
+    return SharedCache
+
+
+def EncodeFile(FileName):
+    'Returns the base64 encoding of a file using the shared asset cache'
+    return GetSharedCache().EncodeFile(FileName)
+
+
+def FileHash(FileName):
+    'Returns the content hash of a file using the shared asset cache'
+    return GetSharedCache().FileHash(FileName)
@@ -0,0 +1,91 @@
+###############################################################################
+# Copyright (C) 2024 Jacob Barhak
+#
+###############################################################################
+#
+# Feel free to contact the author
+# --
+# Jacob Barhak Ph.D.
+# jacob.barhak@gmail.com
+# http://sites.google.com/site/jacobbarhak/
+#
+#
+# Embeds standalone bokeh html files into a presentation without their
+# BokehJS library. A standalone html file saved by bokeh, holoviews or panel
+# carries a full copy of BokehJS that is over a MB in size. The presentation
+# already loads BokehJS, so only the document json and the render items of the
+# file are extracted and rendered by the BokehJS of the presentation.
+
+
+import collections
+import json
+import re
+import uuid
+
+import bokeh
+
+DocsJsonPattern = re.compile(r'<script type="application/json" id="([^"]+)">\s*(.*?)\s*</script>', re.DOTALL)
+RenderItemsPattern = re.compile(r'(?:var|const|let) render_items = (\[.*?\]);\s*\n', re.DOTALL)
+
+EmbedTemplate = '''%(Divs)s
+<script type="application/json" id="%(JsonId)s">%(DocsJson)s</script>
+<script type="text/javascript">
+(function() {
+  var docs_json = document.getElementById('%(JsonId)s').textContent;
+  var render_items = %(RenderItems)s;
+  Bokeh.embed.embed_items(docs_json, render_items);
+})();
+</script>
+'''
+
+
+def MajorMinor(Version):
+    'Returns the major and minor parts of a version string'
+    return tuple(Version.split('.')[:2])
+
+
+def ExtractBokehDocument(Html):
+    'Returns (DocsJson, RenderItems, Versions) of a standalone bokeh html or None'
+    DocsJsonMatch = DocsJsonPattern.search(Html)
+    RenderItemsMatch = RenderItemsPattern.search(Html)
+    if DocsJsonMatch is None or RenderItemsMatch is None:
+        return None
+    DocsJson = DocsJsonMatch.group(2)
+    try:
+        Documents = json.loads(DocsJson)
+        # keep the order of the roots as they appear in the file
+        RenderItems = json.loads(RenderItemsMatch.group(1), object_pairs_hook=collections.OrderedDict)
+    except ValueError:
+        return None
+    Versions = set(Document.get('version', '') for Document in Documents.values())
+    return (DocsJson, RenderItems, Versions)
+
+
+def EmbedBokehDocument(Html, FileName=''):
+    'Returns html that renders a standalone bokeh file with the BokehJS of the page'
+    if isinstance(Html, bytes):
+        Html = Html.decode('utf-8')
+    Extracted = ExtractBokehDocument(Html)
+    if Extracted is None:
+        print('Cannot extract bokeh document from %s - embedding the whole file' % FileName)
+        return None
+    (DocsJson, RenderItems, Versions) = Extracted
+    if set(MajorMinor(Version) for Version in Versions) != set([MajorMinor(bokeh.__version__)]):
+        print('Bokeh version of %s is %s and does not match %s - embedding the whole file' % (FileName, ', '.join(sorted(Versions)), bokeh.__version__))
+        return None
+    # new element ids allow embedding the same file more than once
+    Divs = []
+    for RenderItem in RenderItems:
+        if 'roots' in RenderItem:
+            RootIds = RenderItem.get('root_ids', list(RenderItem['roots']))
+            RenderItem['roots'] = collections.OrderedDict((RootId, str(uuid.uuid4())) for RootId in RenderItem['roots'])
+            Divs.extend(RenderItem['roots'][RootId] for RootId in RootIds)
+        elif 'elementid' in RenderItem:
+            RenderItem['elementid'] = str(uuid.uuid4())
+            Divs.append(RenderItem['elementid'])
+    EmbeddedHtml = EmbedTemplate % {
+        'Divs': '\n'.join('<div class="bk-root" id="%s"></div>' % ElementId for ElementId in Divs),
+        'JsonId': str(uuid.uuid4()),
+        'DocsJson': DocsJson,
+        'RenderItems': json.dumps(RenderItems)}
+    return EmbeddedHtml
@@ -0,0 +1,261 @@
+###############################################################################
+# Copyright (C) 2024 Jacob Barhak
+#
+###############################################################################
+#
+# Feel free to contact the author
+# --
+# Jacob Barhak Ph.D.
+# jacob.barhak@gmail.com
+# http://sites.google.com/site/jacobbarhak/
+#
+#
+# Builds all the presentations in this repository in parallel.
+# Each presentation script is executed from its own directory by a pool of
+# worker processes. Workers import bokeh / panel / holoviews once and reuse
+# them for all the presentations they build, so the import cost is paid once
+# per worker rather than once per presentation.
+#
+# USAGE:
+#   python BuildAll.py [Deck ...] [--jobs N] [--isolated] [--log-dir Dir]
+#                      [--deck-args "EmbedVideo ..."]
+#
+# Deck names are the directory names of the presentations. If none are given
+# all presentations found in the repository are built.
+#
+# Builds are incremental: presentations whose inputs did not change since their
+# last successful build are not rebuilt, see BuildManifest.py. Use --force to
+# rebuild them anyway.
+
+
+from __future__ import print_function
+
+import argparse
+import collections
+import io
+import multiprocessing
+import os
+import runpy
+import sys
+import time
+import traceback
+
+import BuildManifest
+
+BuildToolsDir = os.path.dirname(os.path.abspath(__file__))
+RepositoryDir = os.path.dirname(BuildToolsDir)
+DefaultLogDir = os.path.join(RepositoryDir, 'BuildLogs')
+
+# directories that hold code but are not presentations
+NonDeckDirs = ['BuildTools']
+
+# code that marks a script as one that saves a presentation
+OutputMarkers = ['.save(', 'file_html(', 'SavePresentation(']
+
+# libraries imported by every worker before it starts building
+WarmImports = ['numpy', 'bokeh', 'bokeh.resources', 'holoviews', 'panel']
+
+LibraryState = {}
+
+
+def DiscoverDecks(RepositoryDir=RepositoryDir):
+    'Returns a sorted list of (DeckName, ScriptPath) of all presentations'
+    Decks = []
+    for DirName in sorted(os.listdir(RepositoryDir)):
+        DeckDir = os.path.join(RepositoryDir, DirName)
+        if DirName in NonDeckDirs or DirName.startswith('.') or not os.path.isdir(DeckDir):
+            continue
+        for FileName in sorted(os.listdir(DeckDir)):
+            if not FileName.endswith('.py'):
+                continue
+            ScriptPath = os.path.join(DeckDir, FileName)
+            ScriptFile = io.open(ScriptPath, 'r', encoding='utf-8', errors='replace')
+            Source = ScriptFile.read()
+            ScriptFile.close()
+            # a presentation script is one that saves its output
+            if any(Marker in Source for Marker in OutputMarkers):
+                Decks.append((DirName, ScriptPath))
+    return Decks
+
+
+def CheckInterpreter(ScriptPath):
+    'Returns None if this interpreter can compile the script, otherwise the error'
+    ScriptFile = io.open(ScriptPath, 'rb')
+    Source = ScriptFile.read()
+    ScriptFile.close()
+    try:
+        compile(Source, ScriptPath, 'exec')
+    except SyntaxError as Error:
+        return 'Cannot compile with Python %s: %s' % (sys.version.split()[0], Error)
+    return None
+
+
+def InitializeWorker():
+    'Imports the heavy libraries once per worker and records their state'
+    for ModuleName in WarmImports:
+        try:
+            __import__(ModuleName)
+        except ImportError:
+            pass
+    SaveLibraryState()
+
+
+def SaveLibraryState():
+    'Keep global library settings so each deck starts from a clean state'
+    if 'panel' in sys.modules:
+        PanelConfig = sys.modules['panel'].config
+        LibraryState['raw_css'] = list(PanelConfig.raw_css)
+        LibraryState['js_files'] = dict(PanelConfig.js_files)
+        LibraryState['css_files'] = list(PanelConfig.css_files)
+    if 'holoviews' in sys.modules:
+        LibraryState['backend'] = sys.modules['holoviews'].Store.current_backend
+
+
+def RestoreLibraryState():
+    'Undo global settings changed by a previously built deck in this worker'
+    if 'raw_css' in LibraryState:
+        PanelConfig = sys.modules['panel'].config
+        PanelConfig.raw_css = list(LibraryState['raw_css'])
+        PanelConfig.js_files = dict(LibraryState['js_files'])
+        PanelConfig.css_files = list(LibraryState['css_files'])
+    if 'backend' in LibraryState:
+        sys.modules['holoviews'].Store.current_backend = LibraryState['backend']
+
+
+def BuildDeck(DeckName, ScriptPath, DeckArgs, LogDir):
+    'Runs one presentation script in its directory and returns its build record'
+    LogFileName = os.path.join(LogDir, DeckName + '.log')
+    Record = {'Deck': DeckName, 'Script': ScriptPath, 'Log': LogFileName,
+              'Status': 'ok', 'ExitCode': 0, 'Seconds': 0.0, 'Message': '', 'StartTime': time.time()}
+    InterpreterError = CheckInterpreter(ScriptPath)
+    if InterpreterError:
+        Record.update(Status='skipped', ExitCode=None, Message=InterpreterError)
+        return Record
+    RestoreLibraryState()
+    LogFile = io.open(LogFileName, 'wb')
+    SavedState = (os.getcwd(), list(sys.argv))
+    # redirect at the descriptor level so library loggers and progress bars
+    # that hold their own handle on the console also end up in the log
+    sys.stdout.flush()
+    sys.stderr.flush()
+    SavedDescriptors = (os.dup(1), os.dup(2))
+    os.dup2(LogFile.fileno(), 1)
+    os.dup2(LogFile.fileno(), 2)
+    StartTime = Record['StartTime'] = time.time()
+    try:
+        os.chdir(os.path.dirname(ScriptPath))
+        sys.argv = [ScriptPath] + list(DeckArgs)
+        runpy.run_path(ScriptPath, run_name='__main__')
+    except SystemExit as Exit:
+        if Exit.code not in (None, 0):
+            Record.update(Status='failed', ExitCode=Exit.code if isinstance(Exit.code, int) else 1, Message=str(Exit.code))
+    except BaseException as Error:
+        traceback.print_exc()
+        Record.update(Status='failed', ExitCode=1, Message='%s: %s' % (type(Error).__name__, Error))
+    finally:
+        Record['Seconds'] = time.time() - StartTime
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(SavedDescriptors[0], 1)
+        os.dup2(SavedDescriptors[1], 2)
+        os.close(SavedDescriptors[0])
+        os.close(SavedDescriptors[1])
+        (WorkingDir, sys.argv) = SavedState
+        os.chdir(WorkingDir)
+        LogFile.close()
+    return Record
+
+
+def BuildDeckTask(Arguments):
+    'Pool entry point - unpacks the arguments of BuildDeck'
+    return BuildDeck(*Arguments)
+
+
+def BuildDecks(Decks, DeckArgs=(), Jobs=None, LogDir=DefaultLogDir, Isolated=False, Manifest=None, Force=False, Report=print):
+    'Builds the given decks in a process pool and returns their build records'
+    if not os.path.isdir(LogDir):
+        os.makedirs(LogDir)
+    Records = []
+    Fingerprints = {}
+    DecksToBuild = []
+    if Manifest is not None:
+        Versions = BuildManifest.LibraryVersions()
+    for (DeckName, ScriptPath) in Decks:
+        if Manifest is None:
+            DecksToBuild.append((DeckName, ScriptPath))
+            continue
+        (Inputs, Fingerprint) = Manifest.Fingerprint(ScriptPath, DeckArgs, Versions)
+        Fingerprints[DeckName] = (Inputs, Fingerprint)
+        if not Force and Manifest.IsUpToDate(DeckName, Fingerprint):
+            Record = {'Deck': DeckName, 'Script': ScriptPath, 'Log': '', 'Status': 'unchanged',
+                      'ExitCode': 0, 'Seconds': 0.0, 'Message': ''}
+            Report(FormatRecord(Record))
+            Records.append(Record)
+        else:
+            Changed = Manifest.ChangedInputs(DeckName, Inputs)
+            if Changed and DeckName in Manifest.Decks:
+                Report('%-25s %-9s %i changed inputs: %s' % (DeckName, 'rebuild', len(Changed), ', '.join(Changed[:5])))
+            DecksToBuild.append((DeckName, ScriptPath))
+    if DecksToBuild:
+        if Jobs is None:
+            Jobs = multiprocessing.cpu_count()
+        Jobs = max(1, min(Jobs, len(DecksToBuild)))
+        Tasks = [(DeckName, ScriptPath, DeckArgs, LogDir) for (DeckName, ScriptPath) in DecksToBuild]
+        # an isolated build gives every deck a fresh process
+        Pool = multiprocessing.Pool(Jobs, initializer=InitializeWorker, maxtasksperchild=1 if Isolated else None)
+        try:
+            for Record in Pool.imap_unordered(BuildDeckTask, Tasks):
+                if Manifest is not None and Record['Status'] == 'ok':
+                    (Inputs, Fingerprint) = Fingerprints[Record['Deck']]
+                    Outputs = BuildManifest.FindOutputs(Record['Script'], Record['StartTime'])
+                    Manifest.Record(Record['Deck'], Fingerprint, Inputs, Outputs)
+                    # save after every deck so an interrupted build keeps its progress
+                    Manifest.Save()
+                Report(FormatRecord(Record))
+                Records.append(Record)
+        finally:
+            Pool.close()
+            Pool.join()
+    if Manifest is not None:
+        Manifest.Save()
+    Records.sort(key=lambda Record: Record['Deck'])
+    return Records
+
+
+def FormatRecord(Record):
+    'Returns a one line description of a build record'
+    Line = '%-25s %-9s %8.1fs  %s' % (Record['Deck'], Record['Status'], Record['Seconds'], Record['Log'])
+    if Record['Message']:
+        Line += '  (' + Record['Message'] + ')'
+    return Line
+
+
+def Main(Arguments=None):
+    'Command line entry point'
+    Parser = argparse.ArgumentParser(description='Build all presentations in parallel')
+    Parser.add_argument('Decks', nargs='*', help='presentation directory names - all if omitted')
+    Parser.add_argument('--jobs', type=int, default=None, help='number of worker processes - default is the number of cores')
+    Parser.add_argument('--isolated', action='store_true', help='build every deck in a fresh worker process')
+    Parser.add_argument('--log-dir', default=DefaultLogDir, help='directory for per deck build logs')
+    Parser.add_argument('--deck-args', default='', help='arguments passed to every deck script such as EmbedVideo')
+    Parser.add_argument('--force', action='store_true', help='rebuild decks even if their inputs did not change')
+    Parser.add_argument('--manifest', default=BuildManifest.DefaultManifestFileName, help='build manifest file used for incremental builds')
+    Parser.add_argument('--no-manifest', action='store_true', help='always rebuild and do not record the build in the manifest')
+    Options = Parser.parse_args(Arguments)
+    Decks = DiscoverDecks()
+    if Options.Decks:
+        Unknown = set(Options.Decks) - set(DeckName for (DeckName, ScriptPath) in Decks)
+        if Unknown:
+            Parser.error('Unknown decks: ' + ', '.join(sorted(Unknown)))
+        Decks = [Deck for Deck in Decks if Deck[0] in Options.Decks]
+    StartTime = time.time()
+    Manifest = None if Options.no_manifest else BuildManifest.BuildManifest(Options.manifest)
+    Records = BuildDecks(Decks, Options.deck_args.split(), Options.jobs, Options.log_dir, Options.isolated, Manifest, Options.force)
+    Counts = collections.Counter(Record['Status'] for Record in Records)
+    print('Built %i decks in %.1fs: %i unchanged, %i failed, %i skipped' % (Counts['ok'], time.time() - StartTime, Counts['unchanged'], Counts['failed'], Counts['skipped']))
+    Failed = Counts['failed']
+    return 1 if Failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(Main())
@@ -0,0 +1,189 @@
+###############################################################################
+# Copyright (C) 2024 Jacob Barhak
+#
+###############################################################################
+#
+# Feel free to contact the author
+# --
+# Jacob Barhak Ph.D.
+# jacob.barhak@gmail.com
+# http://sites.google.com/site/jacobbarhak/
+#
+#
+# Build manifest used for incremental builds.
+# The manifest records for each presentation the content hash of its script,
+# of every input file under its Images, Data, Resources and Model
+# directories, of the shared build tools, and the versions of the libraries
+# used. A presentation whose fingerprint did not change since its last
+# successful build and whose outputs still exist does not need a rebuild.
+
+
+import hashlib
+import io
+import json
+import os
+import sys
+
+BuildToolsDir = os.path.dirname(os.path.abspath(__file__))
+RepositoryDir = os.path.dirname(BuildToolsDir)
+DefaultCacheDir = os.environ.get('PRESENTATIONS_CACHE_DIR', os.path.join(RepositoryDir, 'BuildCache'))
+DefaultManifestFileName = os.path.join(DefaultCacheDir, 'BuildManifest.json')
+
+# directories within a presentation directory that hold build inputs
+InputDirs = ['Images', 'Data', 'Resources', 'Model']
+
+# libraries whose version affects the generated presentations
+VersionedLibraries = ['bokeh', 'panel', 'holoviews', 'numpy', 'matplotlib', 'pandas', 'Pillow']
+
+HashBlockSize = 1 << 20
+
+
+def HashFile(FileName):
+    'Returns the sha256 hex digest of the file content'
+    Hash = hashlib.sha256()
+    DataFile = io.open(FileName, 'rb')
+    try:
+        Block = DataFile.read(HashBlockSize)
+        while Block:
+            Hash.update(Block)
+            Block = DataFile.read(HashBlockSize)
+    finally:
+        DataFile.close()
+    return Hash.hexdigest()
+
+
+def HashText(Text):
+    'Returns the sha256 hex digest of a text'
+    return hashlib.sha256(Text.encode('utf-8')).hexdigest()
+
+
+def LibraryVersions(Libraries=VersionedLibraries):
+    'Returns a dictionary of the python version and the versions of the libraries'
+    Versions = {'python': sys.version.split()[0]}
+    try:
+        import pkg_resources
+    except ImportError:
+        pkg_resources = None
+    for Library in Libraries:
+        Version = None
+        if pkg_resources is not None:
+            try:
+                Version = pkg_resources.get_distribution(Library).version
+            except Exception:
+                Version = None
+        if Version is None:
+            try:
+                Version = getattr(__import__(Library), '__version__', 'unknown')
+            except ImportError:
+                Version = 'missing'
+        Versions[Library] = Version
+    return Versions
+
+
+def ListFiles(DirName):
+    'Returns a sorted list of all files under a directory'
+    FileNames = []
+    for (Root, SubDirs, Files) in os.walk(DirName):
+        SubDirs.sort()
+        for FileName in sorted(Files):
+            FileNames.append(os.path.join(Root, FileName))
+    return FileNames
+
+
+def DeckInputFiles(ScriptPath):
+    'Returns the files that the output of a presentation script depends on'
+    DeckDir = os.path.dirname(ScriptPath)
+    FileNames = [ScriptPath]
+    for InputDir in InputDirs:
+        FileNames.extend(ListFiles(os.path.join(DeckDir, InputDir)))
+    # presentation scripts may use the shared build tools
+    FileNames.extend(FileName for FileName in ListFiles(BuildToolsDir) if FileName.endswith('.py'))
+    return FileNames
+
+
+class BuildManifest(object):
+    'Persistent record of the inputs and outputs of successful builds'
+
+    def __init__(self, ManifestFileName=DefaultManifestFileName):
+        self.ManifestFileName = ManifestFileName
+        self.Decks = {}
+        # file hashes are reused while the file size and time stamp do not change
+        self.FileHashes = {}
+        if os.path.isfile(ManifestFileName):
+            ManifestFile = io.open(ManifestFileName, 'r', encoding='utf-8')
+            Content = json.load(ManifestFile)
+            ManifestFile.close()
+            self.Decks = Content.get('Decks', {})
+            self.FileHashes = Content.get('FileHashes', {})
+
+    def Save(self):
+        'Write the manifest to disk'
+        ManifestDir = os.path.dirname(self.ManifestFileName)
+        if ManifestDir and not os.path.isdir(ManifestDir):
+            os.makedirs(ManifestDir)
+        TempFileName = self.ManifestFileName + '.tmp'
+        ManifestFile = io.open(TempFileName, 'w', encoding='utf-8')
+        ManifestFile.write(type(u'')(json.dumps({'Decks': self.Decks, 'FileHashes': self.FileHashes}, indent=1, sort_keys=True)))
+        ManifestFile.close()
+        if os.path.exists(self.ManifestFileName):
+            os.remove(self.ManifestFileName)
+        os.rename(TempFileName, self.ManifestFileName)
+
+    def FileHash(self, FileName):
+        'Returns the content hash of a file - rehashing only modified files'
+        Key = os.path.relpath(FileName, RepositoryDir)
+        Status = os.stat(FileName)
+        Cached = self.FileHashes.get(Key)
+        if Cached and Cached['Size'] == Status.st_size and Cached['MTime'] == Status.st_mtime:
+            return Cached['Hash']
+        Hash = HashFile(FileName)
+        self.FileHashes[Key] = {'Size': Status.st_size, 'MTime': Status.st_mtime, 'Hash': Hash}
+        return Hash
+
+    def Fingerprint(self, ScriptPath, DeckArgs=(), Versions=None):
+        'Returns the inputs of a presentation and a single hash combining them'
+        Inputs = {}
+        for FileName in DeckInputFiles(ScriptPath):
+            Inputs[os.path.relpath(FileName, RepositoryDir)] = self.FileHash(FileName)
+        Description = {'Inputs': Inputs, 'Arguments': list(DeckArgs), 'Versions': Versions or {}}
+        return (Inputs, HashText(json.dumps(Description, sort_keys=True)))
+
+    def IsUpToDate(self, DeckName, Fingerprint):
+        'Returns True if the deck was built from the same inputs and its outputs exist'
+        Entry = self.Decks.get(DeckName)
+        if not Entry or Entry['Fingerprint'] != Fingerprint or not Entry['Outputs']:
+            # a build that wrote no detected output is never considered current
+            return False
+        for Output in Entry['Outputs']:
+            if not os.path.isfile(os.path.join(RepositoryDir, Output)):
+                return False
+        return True
+
+    def ChangedInputs(self, DeckName, Inputs):
+        'Returns the sorted list of inputs that differ from the last build'
+        Previous = self.Decks.get(DeckName, {}).get('Inputs', {})
+        Names = set(Inputs) | set(Previous)
+        return sorted(Name for Name in Names if Inputs.get(Name) != Previous.get(Name))
+
+    def Record(self, DeckName, Fingerprint, Inputs, Outputs):
+        'Store the result of a successful build - builds without outputs are not stored'
+        if not Outputs:
+            self.Decks.pop(DeckName, None)
+            return
+        self.Decks[DeckName] = {'Fingerprint': Fingerprint, 'Inputs': Inputs,
+                                'Outputs': sorted(os.path.relpath(Output, RepositoryDir) for Output in Outputs)}
+
+
+def FindOutputs(ScriptPath, SinceTime):
+    'Returns files in a presentation directory written since a given time'
+    DeckDir = os.path.dirname(ScriptPath)
+    InputPaths = [os.path.join(DeckDir, InputDir) + os.sep for InputDir in InputDirs]
+    Outputs = []
+    for FileName in ListFiles(DeckDir):
+        if FileName == ScriptPath or FileName.endswith(('.pyc', '.pyo')) or '__pycache__' in FileName:
+            continue
+        if any(FileName.startswith(InputPath) for InputPath in InputPaths):
+            continue
+        if os.path.getmtime(FileName) >= SinceTime:
+            Outputs.append(FileName)
+    return Outputs
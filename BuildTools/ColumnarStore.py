@@ -0,0 +1,173 @@
+###############################################################################
+# Copyright (C) 2024 Jacob Barhak
+#
+###############################################################################
+#
+# Feel free to contact the author
+# --
+# Jacob Barhak Ph.D.
+# jacob.barhak@gmail.com
+# http://sites.google.com/site/jacobbarhak/
+#
+#
+# Stores holoviews objects as memory mapped arrays with a json sidecar.
+# The matrices and weight histories shown in the presentations were pickled
+# as whole holoviews objects. Unpickling them reads and copies all the data and
+# needs the exact class layout of the holoviews, xarray and pandas versions
+# that pickled them. Here every column of an element is saved as a numpy .npy
+# file and a small json file describes the element type, its dimensions and
+# the files of its columns. Loading maps the .npy files into memory and builds
+# the element from the mapped arrays without copying them. Images whose rows
+# are all the same, such as the distance and cluster number strips under the
+# cluster matrices, keep a single row that is stretched over their bounds, so
+# it is stored and sent to the browser once.
+#
+# Convert pickled objects with:
+# python ColumnarStore.py ../PyDataAustin2019/Data/FileName.pckl
+# Each FileName.pckl is kept and FileName.json with FileName.<n>.npy is added.
+# LoadObject loads the converted files if they exist and the pickle otherwise.
+# Files are found through the shared data store, see DataStore.py, and each
+# array is mapped once per process.
+
+
+import io
+import json
+import os
+import sys
+
+import numpy
+import holoviews
+
+import DataStore
+
+SidecarExtension = '.json'
+FormatVersion = 1
+
+
+def StoreBaseName(FileName):
+    'Returns the file name of a stored object without its extension'
+    return os.path.splitext(FileName)[0]
+
+
+def DimensionSpec(Dimension):
+    'Returns a json description of a holoviews dimension'
+    return [Dimension.name, Dimension.label]
+
+
+def MakeDimension(Spec):
+    'Returns a holoviews dimension from its json description'
+    (Name, Label) = Spec
+    return holoviews.Dimension(Name, label=Label)
+
+
+def CollapseRepeatedRows(Columns, Spec):
+    'Returns the columns of an image keeping one row if all its rows are the same'
+    (XValues, YValues) = Columns[:2]
+    Images = [numpy.asarray(Values) for Values in Columns[2:]]
+    if len(YValues) < 2 or not all(numpy.array_equal(Image, numpy.broadcast_to(Image[:1], Image.shape)) for Image in Images):
+        return Columns
+    # strips drawn as images repeat the same row to their height - a single
+    # row stretched over the stored bounds is drawn the same
+    Spec['RepeatedRows'] = len(YValues)
+    return [XValues, numpy.array([numpy.mean(YValues)])] + [Image[:1] for Image in Images]
+
+
+def ElementSpec(Element, BaseName, Arrays):
+    'Returns a json description of an element and appends its column arrays'
+    Spec = {'Type': type(Element).__name__, 'Group': Element.group, 'Label': Element.label}
+    Spec['KDims'] = [DimensionSpec(Dimension) for Dimension in Element.kdims]
+    if isinstance(Element, holoviews.core.NdMapping):
+        # containers such as NdOverlay and HoloMap hold elements by key
+        Spec['Items'] = [[list(Key), ElementSpec(Item, BaseName, Arrays)] for (Key, Item) in Element.data.items()]
+        return Spec
+    Spec['VDims'] = [DimensionSpec(Dimension) for Dimension in Element.vdims]
+    Spec['Gridded'] = bool(Element.interface.gridded)
+    if hasattr(Element, 'bounds'):
+        # bounds computed from the sampled coordinates lose precision
+        Spec['Bounds'] = [float(Value) for Value in Element.bounds.lbrt()]
+    Spec['Columns'] = []
+    Columns = []
+    # the interface is used directly since elements unpickled from older
+    # holoviews versions lack attributes that the element methods need
+    for Dimension in Element.kdims + Element.vdims:
+        if Spec['Gridded'] and Dimension in Element.kdims:
+            Columns.append(Element.interface.coords(Element, Dimension, expanded=False))
+        else:
+            Columns.append(Element.interface.values(Element, Dimension, flat=not Spec['Gridded']))
+    if 'Bounds' in Spec and Spec['Gridded'] and len(Element.kdims) == 2:
+        Columns = CollapseRepeatedRows(Columns, Spec)
+    for Values in Columns:
+        ArrayFileName = '%s.%i.npy' % (BaseName, len(Arrays))
+        Arrays.append((ArrayFileName, numpy.ascontiguousarray(Values)))
+        Spec['Columns'].append(os.path.basename(ArrayFileName))
+    return Spec
+
+
+def MapArray(FileName):
+    'Returns a read only memory mapped array of a .npy file'
+    return numpy.load(FileName, mmap_mode='r')
+
+
+def MakeElement(Spec, DirName):
+    'Returns a holoviews object built from its json description and mapped arrays'
+    ElementClass = getattr(holoviews, Spec['Type'])
+    KDims = [MakeDimension(DimensionSpec) for DimensionSpec in Spec['KDims']]
+    if 'Items' in Spec:
+        Items = [(tuple(Key), MakeElement(ItemSpec, DirName)) for (Key, ItemSpec) in Spec['Items']]
+        return ElementClass(Items, kdims=KDims, group=Spec['Group'], label=Spec['Label'])
+    VDims = [MakeDimension(DimensionSpec) for DimensionSpec in Spec['VDims']]
+    Columns = tuple(DataStore.CachedLoad(DirName, ArrayFileName, MapArray) for ArrayFileName in Spec['Columns'])
+    Params = {}
+    if 'Bounds' in Spec:
+        Params['bounds'] = tuple(Spec['Bounds'])
+    return ElementClass(Columns, kdims=KDims, vdims=VDims, group=Spec['Group'], label=Spec['Label'], **Params)
+
+
+def ExportObject(Object, FileName):
+    'Stores a holoviews object or a (Name, Object) tuple as arrays with a json sidecar'
+    BaseName = StoreBaseName(FileName)
+    Sidecar = {'Version': FormatVersion, 'Name': None}
+    if isinstance(Object, tuple):
+        (Sidecar['Name'], Object) = Object
+    Arrays = []
+    Sidecar['Object'] = ElementSpec(Object, BaseName, Arrays)
+    for (ArrayFileName, Values) in Arrays:
+        numpy.save(ArrayFileName, Values)
+    SidecarFile = io.open(BaseName + SidecarExtension, 'w', encoding='utf-8')
+    SidecarFile.write(json.dumps(Sidecar, indent=1, sort_keys=True, ensure_ascii=False))
+    SidecarFile.close()
+    return [BaseName + SidecarExtension] + [ArrayFileName for (ArrayFileName, Values) in Arrays]
+
+
+def LoadStoredObject(FileName):
+    'Loads an object from its json sidecar and memory mapped arrays'
+    (DirName, BaseName) = os.path.split(StoreBaseName(FileName))
+    SidecarFile = io.open(DataStore.DataFile(DirName, BaseName + SidecarExtension), 'r', encoding='utf-8')
+    Sidecar = json.load(SidecarFile)
+    SidecarFile.close()
+    if Sidecar.get('Version') != FormatVersion:
+        raise ValueError('Unsupported columnar store version in %s' % FileName)
+    Object = MakeElement(Sidecar['Object'], DirName)
+    if Sidecar['Name'] is not None:
+        return (str(Sidecar['Name']), Object)
+    return Object
+
+
+def LoadObject(FileName):
+    'Loads a pickled holoviews object - from its columnar store if it was converted'
+    (DirName, BaseName) = os.path.split(StoreBaseName(FileName))
+    if DataStore.Exists(DirName, BaseName + SidecarExtension):
+        return LoadStoredObject(FileName)
+    # unpickled objects are not shared since their options are modified
+    return DataStore.ReadPickle(DataStore.DataFile(DirName, os.path.basename(FileName)))
+
+
+def ConvertPickle(FileName):
+    'Converts a pickled holoviews object to the columnar store next to it'
+    (DirName, BaseName) = os.path.split(FileName)
+    return ExportObject(DataStore.ReadPickle(DataStore.DataFile(DirName, BaseName)), FileName)
+
+
+if __name__ == '__main__':
+    for PickleFileName in sys.argv[1:]:
+        print('Converted %s to %s' % (PickleFileName, ', '.join(ConvertPickle(PickleFileName))))
@@ -0,0 +1,249 @@
+###############################################################################
+# Copyright (C) 2024 Jacob Barhak
+#
+###############################################################################
+#
+# Feel free to contact the author
+# --
+# Jacob Barhak Ph.D.
+# jacob.barhak@gmail.com
+# http://sites.google.com/site/jacobbarhak/
+#
+#
+# Shared content addressed store for the data files of the presentations.
+# Several presentations were built from the same results, so their Data
+# directories held byte identical copies of the same files. Here such files
+# are kept once in the SharedData directory at the top of the repository under
+# their content hash, and the SharedData.json index in each Data directory maps
+# the file names used by the presentation to the shared files. Presentations
+# resolve all data files through this index. Loaded data is also kept in
+# memory by content hash, so building several presentations in one process
+# loads each data file once. Data loaded through the cache is shared by all
+# presentations and must not be modified. The memory cache is bounded by an
+# estimate of the memory its loaded data uses, which for pickles of many
+# records is several times the size of the file, the least recently used
+# data is dropped first, and its hits and misses are counted. Memory mapped
+# arrays are read from their files when used and only their headers count.
+#
+# Move data files used by more than one presentation to the store with:
+# python DataStore.py
+
+
+import collections
+import io
+import json
+import os
+import pickle
+import shutil
+import sys
+
+import numpy
+
+import AssetCache
+
+StoreDir = os.path.join(AssetCache.RepositoryDir, 'SharedData')
+IndexFileName = 'SharedData.json'
+
+# maximal estimated memory of the loaded data kept in memory
+DefaultMaxMemoryBytes = int(os.environ.get('PRESENTATIONS_DATA_CACHE_BYTES', 1 << 30))
+
+# containers with more items are estimated from an even sample of them
+SampleSize = 1000
+
+# indices read during this process by data directory
+Indices = {}
+
+
+def ReadIndex(DataDir):
+    'Returns the dictionary of shared file names by data file name of a data directory'
+    AbsoluteDataDir = os.path.abspath(DataDir)
+    if AbsoluteDataDir not in Indices:
+        Index = {}
+        IndexPath = os.path.join(AbsoluteDataDir, IndexFileName)
+        if os.path.isfile(IndexPath):
+            IndexFile = io.open(IndexPath, 'r', encoding='utf-8')
+            Index = json.load(IndexFile)
+            IndexFile.close()
+        Indices[AbsoluteDataDir] = Index
+    return Indices[AbsoluteDataDir]
+
+
+def WriteIndex(DataDir, Index):
+    'Writes the index of a data directory'
+    IndexFile = io.open(os.path.join(DataDir, IndexFileName), 'w', encoding='utf-8')
+    IndexFile.write(json.dumps(Index, indent=1, sort_keys=True, ensure_ascii=False))
+    IndexFile.close()
+    Indices[os.path.abspath(DataDir)] = Index
+
+
+def DataFile(DataDir, FileName):
+    'Returns the path of a data file - a file in the data directory takes precedence'
+    LocalFileName = os.path.join(DataDir, FileName)
+    if not os.path.isfile(LocalFileName):
+        SharedName = ReadIndex(DataDir).get(FileName)
+        if SharedName is not None:
+            return os.path.join(StoreDir, SharedName)
+    return LocalFileName
+
+
+def Exists(DataDir, FileName):
+    'Returns True if a data file exists locally or in the store'
+    return os.path.isfile(DataFile(DataDir, FileName))
+
+
+def DataHash(DataDir, FileName):
+    'Returns the content hash of a data file'
+    FilePath = DataFile(DataDir, FileName)
+    if os.path.dirname(FilePath) == StoreDir:
+        return os.path.splitext(os.path.basename(FilePath))[0]
+    return AssetCache.FileHash(FilePath)
+
+
+def SampledItems(Items, Weight):
+    'Returns (Item, Weight) pairs of an even sample of items standing for all of them'
+    Items = list(Items)
+    Step = max(1, len(Items) // SampleSize)
+    Sample = Items[::Step]
+    return [(Item, Weight * float(len(Items)) / len(Sample)) for Item in Sample]
+
+
+def MemorySize(Data):
+    'Returns an estimate of the bytes of memory used by loaded data and the objects it holds'
+    Size = 0.0
+    Seen = set()
+    Pending = [(Data, 1.0)]
+    while Pending:
+        (Object, Weight) = Pending.pop()
+        if id(Object) in Seen:
+            continue
+        Seen.add(id(Object))
+        # arrays count the data they own, views and memory mapped arrays only
+        # count their header
+        Size += Weight * sys.getsizeof(Object)
+        if isinstance(Object, numpy.ndarray):
+            if Object.dtype.kind == 'O':
+                Pending.extend(SampledItems(Object.ravel().tolist(), Weight))
+        elif isinstance(Object, dict):
+            Pending.extend(SampledItems(Object.items(), Weight))
+        elif isinstance(Object, (list, tuple, set, frozenset)):
+            Pending.extend(SampledItems(Object, Weight))
+        elif hasattr(Object, '__dict__'):
+            Pending.append((Object.__dict__, Weight))
+    return int(Size)
+
+
+class DataCache(object):
+    'Size bounded least recently used cache of loaded data files'
+
+    def __init__(self, MaxMemoryBytes=DefaultMaxMemoryBytes):
+        self.MaxMemoryBytes = MaxMemoryBytes
+        self.Memory = collections.OrderedDict()
+        self.MemoryBytes = 0
+        self.Hits = 0
+        self.Misses = 0
+
+    def Load(self, DataDir, FileName, Loader):
+        'Returns Loader(Path) of a data file, loading each content once'
+        Key = (DataHash(DataDir, FileName), Loader.__name__)
+        if Key in self.Memory:
+            self.Hits += 1
+            Entry = self.Memory.pop(Key)
+            self.Memory[Key] = Entry
+            return Entry[1]
+        self.Misses += 1
+        FilePath = DataFile(DataDir, FileName)
+        Data = Loader(FilePath)
+        self.Remember(Key, MemorySize(Data), Data)
+        return Data
+
+    def Remember(self, Key, Size, Data):
+        'Keep loaded data in memory, dropping the least recently used data'
+        if Size > self.MaxMemoryBytes:
+            return
+        self.Memory[Key] = (Size, Data)
+        self.MemoryBytes += Size
+        while self.MemoryBytes > self.MaxMemoryBytes:
+            (OldKey, (OldSize, OldData)) = self.Memory.popitem(last=False)
+            self.MemoryBytes -= OldSize
+
+    def Report(self):
+        'Returns a line describing the use of the cache'
+        return 'Data cache: %i hits, %i misses, %i files of about %i bytes in memory' % (self.Hits, self.Misses, len(self.Memory), self.MemoryBytes)
+
+
+SharedCache = None
+
+
+def GetSharedCache():
+    'Returns the data cache shared by all presentations built by this process'
+    global SharedCache
+    if SharedCache is None:
+        SharedCache = DataCache()
+    return SharedCache
+
+
+def CachedLoad(DataDir, FileName, Loader):
+    'Returns Loader(Path) of a data file using the shared data cache'
+    return GetSharedCache().Load(DataDir, FileName, Loader)
+
+
+def ReadPickle(FileName):
+    'Returns the object stored in a pickle file'
+    PickleFile = open(FileName, 'rb')
+    if sys.version_info[0] >= 3:
+        # the data files were pickled by python 2
+        Object = pickle.load(PickleFile, encoding='latin1')
+    else:
+        Object = pickle.load(PickleFile)
+    PickleFile.close()
+    return Object
+
+
+def LoadPickle(DataDir, FileName):
+    'Returns the shared object of a pickled data file - do not modify it'
+    return CachedLoad(DataDir, FileName, ReadPickle)
+
+
+def DeckDataDirs(RepositoryDir=AssetCache.RepositoryDir):
+    'Returns the data directories of all presentations'
+    DataDirs = []
+    for DeckName in sorted(os.listdir(RepositoryDir)):
+        DataDir = os.path.join(RepositoryDir, DeckName, 'Data')
+        if os.path.isdir(DataDir):
+            DataDirs.append(DataDir)
+    return DataDirs
+
+
+def ShareDuplicates(DataDirs):
+    'Moves data files found in more than one place to the store and returns their number'
+    FilesByHash = {}
+    for DataDir in DataDirs:
+        for FileName in sorted(os.listdir(DataDir)):
+            FilePath = os.path.join(DataDir, FileName)
+            if FileName != IndexFileName and os.path.isfile(FilePath):
+                FilesByHash.setdefault(AssetCache.FileHash(FilePath), []).append((DataDir, FileName))
+        # files already in the store are counted as another copy
+        for (FileName, SharedName) in ReadIndex(DataDir).items():
+            FilesByHash.setdefault(os.path.splitext(SharedName)[0], []).append((None, FileName))
+    if not os.path.isdir(StoreDir):
+        os.makedirs(StoreDir)
+    SharedCount = 0
+    for (Hash, Copies) in sorted(FilesByHash.items()):
+        LocalCopies = [(DataDir, FileName) for (DataDir, FileName) in Copies if DataDir is not None]
+        if len(Copies) < 2 or not LocalCopies:
+            continue
+        SharedName = Hash + os.path.splitext(LocalCopies[0][1])[1]
+        if not os.path.isfile(os.path.join(StoreDir, SharedName)):
+            shutil.copyfile(os.path.join(*LocalCopies[0]), os.path.join(StoreDir, SharedName))
+        for (DataDir, FileName) in LocalCopies:
+            Index = dict(ReadIndex(DataDir))
+            Index[FileName] = SharedName
+            WriteIndex(DataDir, Index)
+            os.remove(os.path.join(DataDir, FileName))
+        SharedCount += 1
+    return SharedCount
+
+
+if __name__ == '__main__':
+    DataDirs = [os.path.abspath(DataDir) for DataDir in sys.argv[1:]] or DeckDataDirs()
+    print('Moved %i shared data files to %s' % (ShareDuplicates(DataDirs), StoreDir))
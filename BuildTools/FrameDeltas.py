@@ -0,0 +1,136 @@
+###############################################################################
+# Copyright (C) 2024 Jacob Barhak
+#
+###############################################################################
+#
+# Feel free to contact the author
+# --
+# Jacob Barhak Ph.D.
+# jacob.barhak@gmail.com
+# http://sites.google.com/site/jacobbarhak/
+#
+#
+# Weight histories sent as a first row and the changes between rows.
+# The weight history images loaded by LoadHoloviewsComponent hold a row of the
+# weights of a layer for every time step of the training, and the weights
+# change only slightly from one step to the next. Here the first row is kept
+# as the key frame in 32 bit floats and every later row is stored as 8 bit
+# signed codes of its change from the row before, in steps of a size chosen
+# per image so that the largest change fits. The change of each row is taken
+# from the previous row as decoded rather than as given, so the errors do not
+# add up over the rows and every value is within half a step of the original.
+# This is a quarter of the size of the 32 bit image with a much smaller error
+# than 8 bit codes of the values themselves, see QuantizedImage.py. A
+# transform of the image glyph adds up the rows in the browser and keeps the
+# decoded image for the hover tool, and the largest error is printed to the
+# build log.
+
+
+import uuid
+
+import bokeh.models
+import numpy
+
+# largest code of a change between rows
+MaxCode = 127
+
+DecodeCode = '''
+var Decoded = [];
+for (var Index = 0; Index < xs.length; Index++) {
+    var Codes = xs[Index];
+    var Keyframe = Keyframes.data['keyframe'][Index];
+    var Image = new Float32Array(%(Rows)i * %(Columns)i);
+    var Row = Float64Array.from(Keyframe);
+    for (var RowNumber = 0; RowNumber < %(Rows)i; RowNumber++) {
+        for (var Column = 0; Column < %(Columns)i; Column++) {
+            var Position = RowNumber * %(Columns)i + Column;
+            if (RowNumber > 0) {
+                Row[Column] += Codes[Position] * %(Step)r;
+            }
+            Image[Position] = Row[Column];
+        }
+    }
+    Decoded.push(Image);
+}
+window.FrameDeltaImages = window.FrameDeltaImages || {};
+window.FrameDeltaImages['%(Key)s'] = Decoded[0];
+return Decoded;
+'''
+
+HoverCode = '''
+var Image = (window.FrameDeltaImages || {})['%(Key)s'];
+var Column = Math.floor((special_vars.x - %(Left)r) / %(Width)r * %(Columns)i);
+var Row = Math.floor((special_vars.y - %(Bottom)r) / %(Height)r * %(Rows)i);
+if (Image == null || Column < 0 || Column >= %(Columns)i || Row < 0 || Row >= %(Rows)i) {
+    return '';
+}
+return Image[Row * %(Columns)i + Column].toFixed(%(Digits)i);
+'''
+
+
+def RowStep(Values):
+    'Returns the step of the codes of the changes between the rows of a 2D array'
+    Values = numpy.asarray(Values, dtype=numpy.float32)
+    MaxChange = float(numpy.abs(numpy.diff(Values, axis=0)).max()) if len(Values) > 1 else 0.0
+    # the change from a decoded row is at most half a step above the change
+    return MaxChange / (MaxCode - 1) or 1.0
+
+
+def EncodeRows(Values, Step):
+    'Returns the key frame, codes of the changes between rows and maximum error of a 2D array'
+    Values = numpy.asarray(Values, dtype=numpy.float32)
+    Keyframe = Values[0].copy()
+    Codes = numpy.zeros(Values.shape, dtype=numpy.int8)
+    Row = Keyframe.astype(numpy.float64)
+    MaxError = 0.0
+    for RowNumber in range(1, len(Values)):
+        Codes[RowNumber] = numpy.clip(numpy.round((Values[RowNumber] - Row) / Step), -MaxCode, MaxCode)
+        Row = Row + Codes[RowNumber] * Step
+        MaxError = max(MaxError, float(numpy.abs(Row.astype(numpy.float32) - Values[RowNumber]).max()))
+    return (Keyframe, Codes, MaxError)
+
+
+def DecodingHover(Element, Key, Step):
+    'Returns a hover tool of an image that shows the decoded value of the cell under the mouse'
+    (XDimension, YDimension) = Element.kdims
+    (Left, Bottom, Right, Top) = Element.bounds.lbrt()
+    (Rows, Columns) = Element.dimension_values(2, flat=False).shape
+    Digits = max(0, 1 - int(numpy.floor(numpy.log10(Step))))
+    Code = HoverCode % {'Key': Key, 'Left': float(Left), 'Bottom': float(Bottom), 'Width': float(Right - Left), 'Height': float(Top - Bottom), 'Rows': Rows, 'Columns': Columns, 'Digits': Digits}
+    return bokeh.models.HoverTool(
+                        tooltips=[
+                                    (XDimension.pprint_label, '$x'),
+                                    (YDimension.pprint_label, '$y'),
+                                    (Element.vdims[0].pprint_label, '@image{custom}'),
+                                 ],
+                        formatters={'@image': bokeh.models.CustomJSHover(code=Code)},
+                        )
+
+
+def DeltaHook(Key, Name, Step):
+    'Returns a holoviews hook that replaces the image of a plot by its key frame and changes between rows'
+    # the image is encoded once, holoviews runs hooks again when it updates a
+    # plot and every plot of the element needs its own models
+    Encoded = []
+    def Hook(Plot, Element):
+        Source = Plot.handles['source']
+        if not Encoded:
+            Values = Source.data['image'][0]
+            (Keyframe, Codes, MaxError) = EncodeRows(Values, Step)
+            Range = float(numpy.nanmax(Values) - numpy.nanmin(Values))
+            print('Encoded %s as changes between rows with maximal error %g, %.4f%% of the value range' % (Name, MaxError, 100.0 * MaxError / Range if Range else 0.0))
+            Encoded.extend([Keyframe, Codes])
+        (Keyframe, Codes) = Encoded
+        (Rows, Columns) = Codes.shape
+        Keyframes = bokeh.models.ColumnDataSource(data={'keyframe': [Keyframe]})
+        Transform = bokeh.models.CustomJSTransform(args={'Keyframes': Keyframes}, v_func=DecodeCode % {'Key': Key, 'Rows': Rows, 'Columns': Columns, 'Step': Step})
+        Source.data = dict(Source.data, image=[Codes])
+        Plot.handles['glyph'].image = {'field': 'image', 'transform': Transform}
+    return Hook
+
+
+def DeltaElement(Element, Name):
+    'Returns a holoviews image that is sent as its first row and the changes between rows'
+    Key = uuid.uuid4().hex
+    Step = RowStep(Element.dimension_values(2, flat=False))
+    return Element.opts(hooks=[DeltaHook(Key, Name, Step)], tools=[DecodingHover(Element, Key, Step)])
@@ -0,0 +1,86 @@
+###############################################################################
+# Copyright (C) 2024 Jacob Barhak
+#
+###############################################################################
+#
+# Feel free to contact the author
+# --
+# Jacob Barhak Ph.D.
+# jacob.barhak@gmail.com
+# http://sites.google.com/site/jacobbarhak/
+#
+#
+# Draws a grid of histograms with one figure per column.
+# GeneratePlot shows a row of histograms for every phase and pass type, each in
+# its own holoviews pane, so a grid holds dozens of bokeh figures with their
+# own axes, tools and data sources that the browser initializes when the page
+# loads. Here the histograms of the first row are rendered by holoviews as
+# before, and their glyphs are then pointed at one data source that holds the
+# bins of all rows. A filter shared by all figures shows the bins of one row,
+# and a select widget changes that filter in the browser, so the histograms
+# look as before and only one row of figures is created.
+
+
+import bokeh.layouts
+import bokeh.models
+import holoviews
+import numpy
+import panel
+
+import TypedColumns
+
+RowColumn = 'GridRow'
+PlotColumn = 'GridColumn'
+
+SelectRowCode = '''
+RowFilter.group = cb_obj.value;
+for (var Index = 0; Index < Views.length; Index++) {
+    Views[Index].compute_indices();
+}
+Source.change.emit();
+'''
+
+
+def HistogramColumns(Histogram):
+    'Returns the columns holoviews draws a histogram with by their names'
+    Edges = numpy.asarray(Histogram.edges, dtype=float)
+    Centers = (Edges[:-1] + Edges[1:]) / 2.0
+    Values = numpy.asarray(Histogram.dimension_values(1), dtype=float)
+    Columns = {'left': Edges[:-1], 'right': Edges[1:], 'top': Values, 'x': Centers}
+    # hover tools refer to the dimensions by their names
+    Columns[holoviews.core.util.dimension_sanitizer(Histogram.kdims[0].name)] = Centers
+    Columns[holoviews.core.util.dimension_sanitizer(Histogram.vdims[0].name)] = Values
+    return Columns
+
+
+def GlyphRenderer(Figure):
+    'Returns the renderer of the histogram glyph of a figure'
+    return [Renderer for Renderer in Figure.renderers if isinstance(Renderer, bokeh.models.GlyphRenderer)][0]
+
+
+def ConsolidatedRows(PlotList, Width=300):
+    'Returns a pane of a select widget and one figure per column that shows the histograms of the selected row of [(Title, [Histogram])]'
+    Figures = [holoviews.render(Histogram, backend='bokeh') for Histogram in PlotList[0][1]]
+    ColumnNames = list(GlyphRenderer(Figures[0]).data_source.data)
+    Data = dict((Name, []) for Name in ColumnNames + [RowColumn, PlotColumn])
+    for (RowNumber, (PlotTitle, Histograms)) in enumerate(PlotList):
+        for (ColumnNumber, Histogram) in enumerate(Histograms):
+            Columns = HistogramColumns(Histogram)
+            for Name in ColumnNames:
+                Data[Name].extend(Columns[Name])
+            Data[RowColumn].extend([str(RowNumber)] * len(Columns['top']))
+            Data[PlotColumn].extend([str(ColumnNumber)] * len(Columns['top']))
+    # the bins are sent as typed arrays, the group filters need string columns
+    for Name in ColumnNames:
+        Data[Name] = TypedColumns.NarrowestArray(Data[Name])
+    Source = bokeh.models.ColumnDataSource(data=Data)
+    RowFilter = bokeh.models.GroupFilter(column_name=RowColumn, group='0')
+    Views = []
+    for (ColumnNumber, Figure) in enumerate(Figures):
+        Renderer = GlyphRenderer(Figure)
+        Renderer.data_source = Source
+        Renderer.view = bokeh.models.CDSView(source=Source, filters=[RowFilter, bokeh.models.GroupFilter(column_name=PlotColumn, group=str(ColumnNumber))])
+        Views.append(Renderer.view)
+    Selector = bokeh.models.Select(value='0', options=[(str(RowNumber), PlotTitle) for (RowNumber, (PlotTitle, Histograms)) in enumerate(PlotList)], width=Width)
+    Selector.js_on_change('value', bokeh.models.CustomJS(args=dict(Source=Source, RowFilter=RowFilter, Views=Views), code=SelectRowCode))
+    return panel.pane.Bokeh(bokeh.layouts.column(Selector, bokeh.layouts.row(*Figures)), margin=(0, 0, 0, 0))
@@ -0,0 +1,141 @@
+###############################################################################
+# Copyright (C) 2024 Jacob Barhak
+#
+###############################################################################
+#
+# Feel free to contact the author
+# --
+# Jacob Barhak Ph.D.
+# jacob.barhak@gmail.com
+# http://sites.google.com/site/jacobbarhak/
+#
+#
+# Computes the histograms of the prediction quality plots of GeneratePlot.
+# The prediction qualities of each phase and pass type are a list with a
+# record per prediction holding a value for each plot type. GeneratePlot used
+# to build a list of values for every plot type with a python loop over all
+# records, call numpy.histogram for it, and sum all the bins before each bin
+# for cumulative plots. Here the records of each phase and pass type are
+# converted to one array, or read from their compact arrays, see
+# QualityStore.py, the values of each plot type are counted by numpy.bincount,
+# and cumulative plots are computed by numpy.cumsum.
+# Bins are the integers from 0 to the number of categories of the plot type,
+# values above it are counted in the last bin, and boolean plot types have the
+# bins 0 and 1, as GeneratePlot defined them. The histograms of a grid are
+# cached on disk by the content hash of the data file, the keys and plot types
+# shown and the number of categories, so later builds do not load the data.
+# LoadHistogramGrid returns the bins as arrays of the narrowest type bokeh
+# sends as typed arrays, see TypedColumns.py.
+
+
+import hashlib
+import io
+import itertools
+import json
+import os
+
+import numpy
+
+import AssetCache
+import DataStore
+import QualityStore
+import TypedColumns
+
+DefaultCacheDir = os.path.join(AssetCache.DefaultCacheDir, 'Histograms')
+
+# change when the computed histograms change to ignore older cache entries
+CacheVersion = 1
+
+# categories of plot types whose values are hit or miss
+BooleanCategories = 2
+
+
+def PlotTypeBins(NumberOfCategories, IsPlotTypeBoolean):
+    'Returns the bin edges of a plot type as GeneratePlot defines them'
+    if IsPlotTypeBoolean:
+        return numpy.array([-0.5, 0.5, 1.5])
+    return numpy.arange(NumberOfCategories + 2) - 0.5
+
+
+def QualityColumns(Records, NumberOfPlotTypes):
+    'Returns an array of the values of each plot type of the existing records'
+    if getattr(Records, 'dtype', None) is not None and Records.dtype.names:
+        # compact records keep the values of each plot type in a field
+        Valid = Records[QualityStore.ValidField]
+        return [Records[Field][Valid] for Field in QualityStore.QualityFields(Records.dtype)[:NumberOfPlotTypes]]
+    Records = [Record for Record in Records if Record is not None]
+    # records may hold more values than the plot types shown
+    Values = itertools.chain.from_iterable(Record[:NumberOfPlotTypes] for Record in Records)
+    Qualities = numpy.fromiter(Values, dtype=float, count=len(Records) * NumberOfPlotTypes).reshape(len(Records), NumberOfPlotTypes)
+    return [Qualities[:, Column] for Column in range(NumberOfPlotTypes)]
+
+
+def BinCounts(Values, Cap, NumberOfBins):
+    'Returns the number of values in each bin after capping them'
+    # values are capped and rounded to the bin they fall in - values outside
+    # the bins are not counted
+    BinIndices = numpy.minimum(Values, Cap)
+    if BinIndices.dtype.kind == 'f':
+        BinIndices = numpy.floor(BinIndices + 0.5).astype(numpy.int64)
+    Valid = (BinIndices >= 0) & (BinIndices < NumberOfBins)
+    return numpy.bincount(BinIndices[Valid], minlength=NumberOfBins)[:NumberOfBins]
+
+
+def QualityHistograms(Columns, PlotTypes, NumberOfCategories):
+    'Returns a list of (Edges, Frequencies) for the values of each plot type'
+    Histograms = []
+    for (Values, (PlotTypeName, IsPlotTypeBoolean)) in zip(Columns, PlotTypes):
+        Edges = PlotTypeBins(NumberOfCategories, IsPlotTypeBoolean)
+        Counts = BinCounts(Values, [NumberOfCategories, BooleanCategories][IsPlotTypeBoolean], len(Edges) - 1)
+        # proportions of the counted values, as numpy.histogram with density
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            Frequencies = Counts / float(Counts.sum())
+        if not IsPlotTypeBoolean:
+            Frequencies = numpy.cumsum(Frequencies)
+        Histograms.append((Edges, Frequencies))
+    return Histograms
+
+
+def HistogramGrid(PredictionQualities, Keys, PlotTypes, NumberOfCategories):
+    'Returns a dictionary of (Edges, Frequencies) by (Key, PlotTypeName) for all the plots of a grid - cumulative unless the plot type is boolean'
+    Grid = {}
+    for Key in Keys:
+        Columns = QualityColumns(PredictionQualities[Key], len(PlotTypes))
+        Histograms = QualityHistograms(Columns, PlotTypes, NumberOfCategories)
+        for ((PlotTypeName, IsPlotTypeBoolean), Histogram) in zip(PlotTypes, Histograms):
+            Grid[(Key, PlotTypeName)] = Histogram
+    return Grid
+
+
+def JsonKey(Key):
+    'Returns a json description of a prediction qualities key'
+    if isinstance(Key, tuple):
+        return list(Key)
+    return Key
+
+
+def GridCacheKey(DataHash, Keys, PlotTypes, NumberOfCategories):
+    'Returns the cache key of the histograms of a grid'
+    Description = [CacheVersion, DataHash, [JsonKey(Key) for Key in Keys], [list(PlotType) for PlotType in PlotTypes], NumberOfCategories]
+    return hashlib.sha256(json.dumps(Description, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def LoadHistogramGrid(DataDir, FileName, Keys, PlotTypes, NumberOfCategories, CacheDir=DefaultCacheDir):
+    'Returns the HistogramGrid of a data file, cached across builds by the content of the file'
+    GridKeys = [(Key, PlotTypeName) for Key in Keys for (PlotTypeName, IsPlotTypeBoolean) in PlotTypes]
+    CacheFileName = os.path.join(CacheDir, GridCacheKey(DataStore.DataHash(DataDir, FileName), Keys, PlotTypes, NumberOfCategories) + '.json')
+    if os.path.isfile(CacheFileName):
+        CacheFile = io.open(CacheFileName, 'r', encoding='utf-8')
+        Entries = json.load(CacheFile)
+        CacheFile.close()
+        return dict((GridKey, (TypedColumns.NarrowestArray(Edges), TypedColumns.NarrowestArray(Frequencies))) for (GridKey, (Edges, Frequencies)) in zip(GridKeys, Entries))
+    Grid = HistogramGrid(QualityStore.LoadQualities(DataDir, FileName), Keys, PlotTypes, NumberOfCategories)
+    if not os.path.isdir(CacheDir):
+        try:
+            os.makedirs(CacheDir)
+        except OSError:
+            # created by another build process
+            pass
+    Entries = [[Grid[GridKey][0].tolist(), Grid[GridKey][1].tolist()] for GridKey in GridKeys]
+    AssetCache.WriteFileAtomic(CacheFileName, json.dumps(Entries).encode('utf-8'))
+    return dict((GridKey, (TypedColumns.NarrowestArray(Edges), TypedColumns.NarrowestArray(Frequencies))) for (GridKey, (Edges, Frequencies)) in Grid.items())
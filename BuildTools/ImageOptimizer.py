@@ -0,0 +1,142 @@
+###############################################################################
+# Copyright (C) 2024 Jacob Barhak
+#
+###############################################################################
+#
+# Feel free to contact the author
+# --
+# Jacob Barhak Ph.D.
+# jacob.barhak@gmail.com
+# http://sites.google.com/site/jacobbarhak/
+#
+#
+# Optimizes images before they are embedded in a presentation.
+# Images are often stored in a much higher resolution than the width they are
+# displayed at, and the browser scales them down after the full bitmap was
+# downloaded as base64 text. Here each image is resized to at least twice its
+# display width, so it stays sharp on high density screens, and encoded as
+# lossless WebP and as optimized PNG. The smallest of these and the original
+# file is embedded, so a small original is kept even if its resolution is
+# higher. Photographs in JPEG format are encoded with bounded loss instead.
+# Results are cached on disk by the content hash of the image and the width.
+# Images are embedded unchanged if Pillow is not installed.
+
+
+import io
+import os
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+import AssetCache
+
+DefaultCacheDir = os.path.join(AssetCache.DefaultCacheDir, 'Images')
+
+# comma separated image formats to consider - set to png to avoid WebP
+# or to original to embed all images unchanged
+ImageFormats = os.environ.get('PRESENTATIONS_IMAGE_FORMATS', 'webp,png').lower().split(',')
+
+# pixel density of high resolution screens
+ScaleFactor = 2
+
+# widths images are resized to - an image displayed at similar widths in
+# several places is resized to the same width and embedded once, see
+# SharedImages.py
+WidthSteps = [64, 128, 192, 256, 384, 512, 768, 1024, 1536, 2048, 3072]
+
+# quality used for images that were already lossy
+LossyQuality = 90
+
+# change when the choice of the embedded encoding changes
+CacheVersion = 2
+
+MimeTypes = {'png': 'image/png', 'webp': 'image/webp', 'jpeg': 'image/jpeg', 'gif': 'image/gif'}
+
+
+def FormatName(FileName):
+    'Returns the image format name matching the extension of a file'
+    Extension = os.path.splitext(FileName)[1].lower().lstrip('.')
+    return {'jpg': 'jpeg'}.get(Extension, Extension)
+
+
+def TargetWidth(Width):
+    'Returns the width an image displayed at a given width is resized to'
+    for Step in WidthSteps:
+        if Step >= Width * ScaleFactor:
+            return Step
+    return Width * ScaleFactor
+
+
+def EncodeCandidates(Picture, Lossy):
+    'Returns a dictionary of the image encoded in each of the enabled formats'
+    Candidates = {}
+    for Format in ImageFormats:
+        Output = io.BytesIO()
+        try:
+            if Format == 'webp' and Lossy:
+                Picture.save(Output, 'WEBP', quality=LossyQuality)
+            elif Format == 'webp':
+                Picture.save(Output, 'WEBP', lossless=True, quality=100)
+            elif Format == 'png' and not Lossy:
+                Picture.save(Output, 'PNG', optimize=True)
+            elif Format == 'png':
+                Picture.convert('RGB').save(Output, 'JPEG', quality=LossyQuality, optimize=True)
+                Format = 'jpeg'
+            else:
+                continue
+        except (IOError, KeyError, ValueError):
+            # this Pillow build cannot write the format
+            continue
+        Candidates[Format] = Output.getvalue()
+    return Candidates
+
+
+def OptimizeImage(FileName, Width):
+    'Returns (Format, Data) of the smallest encoding of an image for a display width'
+    DataFile = io.open(FileName, 'rb')
+    Original = DataFile.read()
+    DataFile.close()
+    Format = FormatName(FileName)
+    Picture = Image.open(io.BytesIO(Original))
+    if getattr(Picture, 'is_animated', False):
+        return (Format, Original)
+    Lossy = Picture.format == 'JPEG'
+    NewWidth = TargetWidth(Width)
+    if Picture.size[0] > NewWidth:
+        NewHeight = max(1, int(round(Picture.size[1] * float(NewWidth) / Picture.size[0])))
+        if Picture.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+            Picture = Picture.convert('RGBA')
+        Picture = Picture.resize((NewWidth, NewHeight), Image.LANCZOS)
+    # the original is kept apart from an encoding in its own format and wins ties
+    Candidates = [(Format, Original)] + sorted(EncodeCandidates(Picture, Lossy).items())
+    return min(Candidates, key=lambda Candidate: len(Candidate[1]))
+
+
+def OptimizedFile(FileName, Width, CacheDir=DefaultCacheDir):
+    'Returns the name of a cached file holding the optimized image'
+    Key = '%s-%i-%s-v%i' % (AssetCache.FileHash(FileName), TargetWidth(Width), '-'.join(ImageFormats), CacheVersion)
+    for Format in MimeTypes:
+        CachedFileName = os.path.join(CacheDir, Key + '.' + Format)
+        if os.path.isfile(CachedFileName):
+            return CachedFileName
+    (Format, Data) = OptimizeImage(FileName, Width)
+    if not os.path.isdir(CacheDir):
+        try:
+            os.makedirs(CacheDir)
+        except OSError:
+            # created by another build process
+            pass
+    CachedFileName = os.path.join(CacheDir, Key + '.' + Format)
+    AssetCache.WriteFileAtomic(CachedFileName, Data)
+    return CachedFileName
+
+
+def EncodeImage(FileName, Width):
+    'Returns (MimeType, Base64Data) of an image optimized for its display width'
+    Format = FormatName(FileName)
+    if Image is not None and 'original' not in ImageFormats and Format in MimeTypes:
+        FileName = OptimizedFile(FileName, Width)
+        Format = FormatName(FileName)
+    return (MimeTypes.get(Format, 'image/' + Format), AssetCache.EncodeFile(FileName))
@@ -0,0 +1,286 @@
+###############################################################################
+# Copyright (C) 2024 Jacob Barhak
+#
+###############################################################################
+#
+# Feel free to contact the author
+# --
+# Jacob Barhak Ph.D.
+# jacob.barhak@gmail.com
+# http://sites.google.com/site/jacobbarhak/
+#
+#
+# Tabs whose content is rendered only when the tab is first shown.
+# A presentation built with panel.layout.Tabs renders the models of all tabs
+# when the page loads, so the browser initializes many plots the viewer did
+# not open yet. Here the content of each inactive tab is serialized as a
+# separate bokeh document. The tab itself only holds a placeholder of the same
+# size and a script that renders the serialized document the first time the
+# placeholder becomes visible. The serialized document is written into the
+# page as a json script by AddItemScripts when the presentation is saved, so it
+# is not escaped again as the text of the placeholder. With a payload
+# directory it is written to a separate file that is fetched at that time
+# instead, see SplitOutput.py. The placeholder is sized from the layout of the
+# content, and the height of text and images without a size is estimated from
+# the text and the image data.
+
+
+import base64
+import io
+import json
+import re
+import uuid
+import weakref
+
+import bokeh.embed
+import bokeh.models
+import panel
+
+import ImageOptimizer
+import SplitOutput
+import TypedColumns
+
+# width of content that does not define its width
+DefaultWidth = 1100
+TabHeaderHeight = 30
+
+# used to estimate the height of text that does not define its size
+LineHeight = 24
+CharacterWidth = 8
+BlockPattern = re.compile(r'<(?:p|h[1-6]|li|tr|br|pre|div)\b', re.IGNORECASE)
+ImagePattern = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+TagPattern = re.compile(r'<[^>]*>')
+ImageDataPattern = re.compile(r'src=["\']data:image/[a-z]+;base64,([A-Za-z0-9+/=]+)')
+
+# base64 characters decoded to find the size of an image
+ImageHeaderLength = 65536
+
+# json items of the inline placeholders by their html pane
+InlineItems = weakref.WeakKeyDictionary()
+
+PlaceholderTemplate = '''<div id="%(TargetId)s" style="width:%(Width)ipx;height:%(Height)ipx;"></div>
+<script type="text/javascript">
+(function() {
+%(Materialize)s
+  function observe() {
+    var target = document.getElementById('%(TargetId)s');
+    if (target === null) {
+      setTimeout(observe, 50);
+    } else if ('IntersectionObserver' in window) {
+      // hidden tabs do not intersect the view port until they are activated
+      var observer = new IntersectionObserver(function(entries) {
+        for (var i = 0; i < entries.length; i++) {
+          if (entries[i].isIntersecting) {
+            observer.disconnect();
+            materialize();
+            return;
+          }
+        }
+      });
+      observer.observe(target);
+    } else {
+      materialize();
+    }
+  }
+  observe();
+})();
+</script>
+'''
+
+InlineItemTemplate = '<script type="application/json" id="%(TargetId)s-item">%(Item)s</script>\n'
+
+InlineMaterializeTemplate = '''  function materialize() {
+    var target = document.getElementById('%(TargetId)s');
+    if (target.getAttribute('data-materialized')) return;
+    target.setAttribute('data-materialized', 'true');
+    var item = JSON.parse(document.getElementById('%(TargetId)s-item').textContent);
+    Bokeh.embed.embed_item(item, '%(TargetId)s');
+  }'''
+
+FetchMaterializeTemplate = '''  function materialize() {
+    var target = document.getElementById('%(TargetId)s');
+    if (target.getAttribute('data-materialized')) return;
+    target.setAttribute('data-materialized', 'true');
+    fetch('%(Url)s').then(function(response) {
+      return response.json();
+    }).then(function(item) {
+      Bokeh.embed.embed_item(item, '%(TargetId)s');
+    }).catch(function(error) {
+      target.textContent = 'Cannot load %(Url)s: ' + error;
+    });
+  }'''
+
+
+def MarginSize(Model):
+    'Returns the total (horizontal, vertical) margin of a bokeh model'
+    Margin = getattr(Model, 'margin', None)
+    if Margin is None:
+        return (0, 0)
+    if isinstance(Margin, int):
+        return (2 * Margin, 2 * Margin)
+    if len(Margin) == 2:
+        return (2 * Margin[1], 2 * Margin[0])
+    return (Margin[1] + Margin[3], Margin[0] + Margin[2])
+
+
+def AttributeValue(Tag, Name):
+    'Returns the integer value of an attribute of an html tag or None'
+    Match = re.search(r'\b%s=["\']?(\d+)' % Name, Tag)
+    return int(Match.group(1)) if Match else None
+
+
+def ImageHeight(Tag, Width):
+    'Returns the height of an html image element estimated from its attributes and data'
+    Height = AttributeValue(Tag, 'height')
+    if Height:
+        return Height
+    Width = AttributeValue(Tag, 'width') or Width
+    Match = ImageDataPattern.search(Tag)
+    if Match is not None and ImageOptimizer.Image is not None:
+        Data = Match.group(1)[:ImageHeaderLength]
+        try:
+            Size = ImageOptimizer.Image.open(io.BytesIO(base64.b64decode(Data[:len(Data) // 4 * 4]))).size
+            return int(round(Width * float(Size[1]) / Size[0]))
+        except Exception:
+            # the header of the image is not within the decoded data
+            pass
+    return Width
+
+
+def TextHeight(Text, Width):
+    'Returns the height of html text estimated from its lines, blocks and images'
+    Text = Text.replace('&lt;', '<').replace('&gt;', '>').replace('&quot;', '"').replace('&amp;', '&')
+    Height = sum(ImageHeight(Tag, Width) for Tag in ImagePattern.findall(Text))
+    Characters = len(TagPattern.sub('', Text).strip())
+    Lines = len(BlockPattern.findall(Text)) + Characters * CharacterWidth // max(Width, 1)
+    return Height + LineHeight * max(Lines, 1 if Characters else 0)
+
+
+def Known(Values):
+    'Returns the values that are not None'
+    return [Value for Value in Values if Value is not None]
+
+
+def LayoutSize(Model, Width):
+    'Returns the (width, height) of a bokeh model within Width, None where the model does not tell'
+    if isinstance(Model, bokeh.models.Tabs):
+        Sizes = [EstimateSize(Tab.child, Width) for Tab in Model.tabs]
+        return (max(Known([Size[0] for Size in Sizes]) or [None]), max(Known([Size[1] for Size in Sizes]) or [0]) + TabHeaderHeight)
+    if isinstance(Model, bokeh.models.Column):
+        Sizes = [EstimateSize(Child, Width) for Child in Model.children]
+        return (max(Known([Size[0] for Size in Sizes]) or [None]), sum(Known([Size[1] for Size in Sizes])))
+    if isinstance(Model, bokeh.models.Row):
+        # children without a width share the width the others leave
+        Widths = [getattr(Child, 'width', None) for Child in Model.children]
+        Shared = max(1, Width - sum(Known(Widths))) // max(1, len(Widths) - len(Known(Widths)))
+        Sizes = [EstimateSize(Child, ChildWidth or Shared) for (Child, ChildWidth) in zip(Model.children, Widths)]
+        return (sum(Known([Size[0] for Size in Sizes])) or None, max(Known([Size[1] for Size in Sizes]) or [0]))
+    if isinstance(Model, bokeh.models.GridBox):
+        RowHeights = {}
+        ColumnWidths = {}
+        for Child in Model.children:
+            (ChildWidth, ChildHeight) = EstimateSize(Child[0], Width)
+            RowHeights[Child[1]] = max(RowHeights.get(Child[1], 0), ChildHeight or 0)
+            ColumnWidths[Child[2]] = max(ColumnWidths.get(Child[2], 0), ChildWidth or 0)
+        return (sum(ColumnWidths.values()) or None, sum(RowHeights.values()))
+    if isinstance(Model, bokeh.models.Markup) and Model.text:
+        return (None, TextHeight(Model.text, Width))
+    return (None, None)
+
+
+def EstimateSize(Model, Width=DefaultWidth):
+    'Returns the (width, height) a bokeh model occupies within Width, None where it cannot be told'
+    (MarginWidth, MarginHeight) = MarginSize(Model)
+    # older bokeh versions keep the size of plots in plot_width and plot_height
+    OwnWidth = getattr(Model, 'width', None) or getattr(Model, 'plot_width', None)
+    OwnHeight = getattr(Model, 'height', None) or getattr(Model, 'plot_height', None)
+    if OwnWidth is None or OwnHeight is None:
+        (LayoutWidth, LayoutHeight) = LayoutSize(Model, (OwnWidth or Width) - MarginWidth)
+        OwnWidth = OwnWidth or LayoutWidth
+        OwnHeight = OwnHeight or LayoutHeight
+    return (OwnWidth and OwnWidth + MarginWidth, OwnHeight and OwnHeight + MarginHeight)
+
+
+def BundleStubs(Root):
+    'Returns hidden models that make the page load the BokehJS bundles the content needs'
+    Stubs = []
+    References = Root.references()
+    if any(isinstance(Model, bokeh.models.widgets.TableWidget) for Model in References):
+        Stubs.append(bokeh.models.widgets.DataTable(source=bokeh.models.ColumnDataSource(), visible=False, width=0, height=0))
+    if any(isinstance(Model, bokeh.models.Plot) and Model.output_backend == 'webgl' for Model in References):
+        Stubs.append(bokeh.models.Plot(output_backend='webgl', visible=False, width=0, height=0, toolbar_location=None))
+    return Stubs
+
+
+def SerializeContent(PanelObject, Name='a tab'):
+    'Returns the json item, size and models needed to display a panel object'
+    Root = PanelObject.get_root()
+    TypedColumns.ReportListColumns(Root, Name)
+    Item = bokeh.embed.json_item(Root)
+    (Width, Height) = EstimateSize(Root)
+    return (Item, (Width or DefaultWidth, Height or LineHeight), BundleStubs(Root))
+
+
+def EscapeScriptText(Text):
+    'Prevents a closing tag or comment inside json from changing the script element'
+    return Text.replace('</', '<\\/').replace('<!--', '<\\u0021--')
+
+
+def Placeholder(PanelObject, PayloadDir=None, Name='a tab'):
+    'Returns a panel object that renders the given object when first shown'
+    (Item, (Width, Height), Stubs) = SerializeContent(PanelObject, Name)
+    TargetId = 'lazy-' + str(uuid.uuid4())
+    Values = {'TargetId': TargetId, 'Width': Width, 'Height': Height}
+    if PayloadDir is None:
+        Values['Materialize'] = InlineMaterializeTemplate % Values
+    else:
+        Values['Url'] = SplitOutput.WritePayload(PayloadDir, json.dumps(Item), '.json')
+        Values['Materialize'] = FetchMaterializeTemplate % Values
+    Pane = panel.pane.HTML(PlaceholderTemplate % Values, width=Width, height=Height, margin=(0, 0, 0, 0))
+    if PayloadDir is None:
+        # written into the page by AddItemScripts
+        InlineItems[Pane] = (TargetId, json.dumps(Item))
+    Objects = [Pane]
+    Objects.extend(panel.pane.Bokeh(Stub) for Stub in Stubs)
+    return panel.Column(*Objects, margin=(0, 0, 0, 0))
+
+
+def Tabs(*Items, **Params):
+    'Same as panel.layout.Tabs with inactive tabs rendered on first activation'
+    Lazy = Params.pop('lazy', True)
+    PayloadDir = Params.pop('payload_dir', None)
+    if not Lazy:
+        return panel.layout.Tabs(*Items, **Params)
+    Active = Params.get('active', 0)
+    LazyItems = []
+    for (Index, (Name, PanelObject)) in enumerate(Items):
+        if Index != Active:
+            PanelObject = Placeholder(panel.panel(PanelObject), PayloadDir, 'tab %s' % Name)
+        LazyItems.append((Name, PanelObject))
+    return panel.layout.Tabs(*LazyItems, **Params)
+
+
+def PlaceholderPanes(PanelObject):
+    'Yields the html panes of the inline placeholders within a panel object'
+    if PanelObject in InlineItems:
+        yield PanelObject
+    Objects = getattr(PanelObject, 'objects', None) or []
+    if isinstance(Objects, dict):
+        Objects = Objects.values()
+    for Object in Objects:
+        for Pane in PlaceholderPanes(Object):
+            yield Pane
+
+
+def AddItemScripts(Html, PanelObject):
+    'Inserts the json items of the inline placeholders within a panel object at the end of the html body'
+    Scripts = []
+    for Pane in PlaceholderPanes(PanelObject):
+        (TargetId, Item) = InlineItems[Pane]
+        Scripts.append(InlineItemTemplate % {'TargetId': TargetId, 'Item': EscapeScriptText(Item)})
+    if not Scripts:
+        return Html
+    Position = Html.rfind('</body>')
+    if Position < 0:
+        Position = len(Html)
+    return Html[:Position] + ''.join(Scripts) + Html[Position:]
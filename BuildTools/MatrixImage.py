@@ -0,0 +1,77 @@
+###############################################################################
+# Copyright (C) 2024 Jacob Barhak
+#
+###############################################################################
+#
+# Feel free to contact the author
+# --
+# Jacob Barhak Ph.D.
+# jacob.barhak@gmail.com
+# http://sites.google.com/site/jacobbarhak/
+#
+#
+# Draws a matrix with named columns and rows as an image.
+# GenerateProximityMap drew the unit proximity records as a holoviews HeatMap,
+# which draws a rectangle glyph with its own hover data for every cell, so the
+# size of the page and the drawing time grow with the number of cells. Here
+# the matrix, see SparseStore.py, is drawn as one image glyph with a cell per
+# unit, and the names of the units are kept once in an index written into the
+# code of the hover tool, which looks up the names of the cell under the mouse
+# in the browser. Missing cells are left empty as in the HeatMap. The names
+# are in the order they first appear in the records, see SparseStore.py, the
+# order holoviews gives the categories of the HeatMap of these records, with
+# the first row at the bottom as on the y axis of the HeatMap.
+
+
+import json
+
+import bokeh.models
+import holoviews
+import numpy
+
+# units shown by name on the axes - larger matrices show cell numbers
+MaxLabelledNames = 100
+
+IndexLookupCode = '''
+var Names = %s;
+var Index = Math.floor(value);
+if (Index < 0 || Index >= Names.length) {
+    return '';
+}
+return Names[Index];
+'''
+
+
+def NameTicks(Names):
+    'Returns axis ticks at the centers of the cells labelled by their names'
+    if len(Names) > MaxLabelledNames:
+        return None
+    return [(Index + 0.5, Name) for (Index, Name) in enumerate(Names)]
+
+
+def IndexHover(ColumnNames, RowNames, Labels):
+    'Returns a hover tool showing the names of the cell under the mouse and its value'
+    (ColumnLabel, RowLabel, ValueLabel) = Labels
+    return bokeh.models.HoverTool(
+                        tooltips=[
+                                    (ColumnLabel, '$x{custom}'),
+                                    (RowLabel, '$y{custom}'),
+                                    (ValueLabel, '@image'),
+                                 ],
+                        formatters={
+                                    '$x': bokeh.models.CustomJSHover(code=IndexLookupCode % json.dumps(ColumnNames)),
+                                    '$y': bokeh.models.CustomJSHover(code=IndexLookupCode % json.dumps(RowNames)),
+                                   },
+                        )
+
+
+def NamedImage(ColumnNames, RowNames, Values, Labels):
+    'Returns a holoviews image of a matrix with named columns and rows with a hover tool labelled by Labels'
+    # a cell of size 1 per name with the first row at the bottom
+    XCenters = numpy.arange(len(ColumnNames)) + 0.5
+    YCenters = numpy.arange(len(RowNames)) + 0.5
+    # single precision halves the image data and is exact enough for colors
+    Values = numpy.asarray(Values, dtype=numpy.float32)
+    Image = holoviews.Image((XCenters, YCenters, Values), bounds=(0, 0, len(ColumnNames), len(RowNames)))
+    Image = Image.opts(tools=[IndexHover(ColumnNames, RowNames, Labels)], xticks=NameTicks(ColumnNames), yticks=NameTicks(RowNames))
+    return Image
@@ -0,0 +1,101 @@
+###############################################################################
+# Copyright (C) 2024 Jacob Barhak
+#
+###############################################################################
+#
+# Feel free to contact the author
+# --
+# Jacob Barhak Ph.D.
+# jacob.barhak@gmail.com
+# http://sites.google.com/site/jacobbarhak/
+#
+#
+# Points of a formula whose parameters are set by sliders in the browser.
+# A holoviews HoloMap of a curve holds a frame for every combination of its
+# parameter values, and a presentation saved with embed=True writes all these
+# frames into the page, so the page grows with the product of the numbers of
+# values of the parameters. Here the formula is a single expression, such as
+# sin(phase + frequency * x) + elevation, that is evaluated by numpy in python
+# and by javascript in the browser. The points of the first parameter values
+# are drawn by holoviews, and every slider evaluates the formula again in the
+# browser when it moves, so the page holds one frame however fine the steps
+# of the sliders are. Evaluate and Points give the same values in python to
+# preview the curve. The formula may use the parameters, the name of the x
+# dimension, arithmetic operators and the functions and constants in MathNames.
+
+
+import itertools
+import json
+
+import bokeh.layouts
+import bokeh.models
+import holoviews
+import numpy
+import panel
+
+# functions and constants known by both numpy and the javascript Math object
+MathNames = ['sin', 'cos', 'tan', 'exp', 'log', 'sqrt', 'abs', 'pi']
+
+EvaluateCode = '''
+var MathNames = %(MathNames)s;
+var Names = %(Names)s;
+var Arguments = MathNames.map(function (Name) { return Name == 'pi' ? Math.PI : Math[Name]; });
+for (var Index = 0; Index < Sliders.length; Index++) {
+    Arguments.push(Sliders[Index].value);
+}
+var Formula = Function.apply(null, MathNames.concat(Names, [%(XName)s, 'return (' + %(Formula)s + ');']));
+var XValues = Source.data[%(XColumn)s];
+var YValues = new Float64Array(XValues.length);
+for (var Index = 0; Index < XValues.length; Index++) {
+    YValues[Index] = Formula.apply(null, Arguments.concat([XValues[Index]]));
+}
+Source.data[%(YColumn)s] = YValues;
+Source.change.emit();
+'''
+
+
+def SliderValues(Start, End, Step):
+    'Returns the values a slider from Start to End in steps of Step can take'
+    return numpy.arange(Start, End + Step / 2.0, Step)
+
+
+def Evaluate(Formula, XName, XValues, Values):
+    'Returns the numpy array of a formula at the x values for a dictionary of parameter values'
+    Namespace = dict((Name, getattr(numpy, Name)) for Name in MathNames)
+    Namespace.update(Values)
+    Namespace[XName] = numpy.asarray(XValues, dtype=float)
+    return numpy.broadcast_to(eval(Formula, {'__builtins__': {}}, Namespace), Namespace[XName].shape)
+
+
+def Points(Formula, XName, XValues, YName, Values):
+    'Returns holoviews points of a formula for a dictionary of parameter values'
+    return holoviews.Points({XName: numpy.asarray(XValues, dtype=float), YName: Evaluate(Formula, XName, XValues, Values)}, kdims=[XName, YName])
+
+
+def ValueRange(Formula, XName, XValues, Parameters):
+    'Returns the smallest and largest values of a formula over all the slider values of [(Name, Start, End, Step)]'
+    (Low, High) = (numpy.inf, -numpy.inf)
+    Names = [Name for (Name, Start, End, Step) in Parameters]
+    for Combination in itertools.product(*[SliderValues(Start, End, Step) for (Name, Start, End, Step) in Parameters]):
+        YValues = Evaluate(Formula, XName, XValues, dict(zip(Names, Combination)))
+        (Low, High) = (min(Low, numpy.nanmin(YValues)), max(High, numpy.nanmax(YValues)))
+    return (float(Low), float(High))
+
+
+def ParametricPoints(Formula, XName, XValues, YName, Parameters, YRange=None, Padding=0.1, SliderWidth=300, **Options):
+    'Returns a pane of the points of a formula with a slider per parameter of [(Name, Start, End, Step)] under them'
+    Names = [Name for (Name, Start, End, Step) in Parameters]
+    if YRange is None:
+        # padded like holoviews pads the range of all the frames of a HoloMap
+        (Low, High) = ValueRange(Formula, XName, XValues, Parameters)
+        YRange = (Low - Padding * (High - Low), High + Padding * (High - Low))
+    Element = Points(Formula, XName, XValues, YName, dict((Name, Start) for (Name, Start, End, Step) in Parameters))
+    Element = Element.opts(padding=(Padding, 0), ylim=YRange).opts(**Options)
+    Figure = holoviews.render(Element, backend='bokeh')
+    Source = [Renderer for Renderer in Figure.renderers if isinstance(Renderer, bokeh.models.GlyphRenderer)][0].data_source
+    Sliders = [bokeh.models.Slider(start=Start, end=End, step=Step, value=Start, title=Name, width=SliderWidth) for (Name, Start, End, Step) in Parameters]
+    Code = EvaluateCode % {'MathNames': json.dumps(MathNames), 'Names': json.dumps(Names), 'Formula': json.dumps(Formula), 'XName': json.dumps(XName), 'XColumn': json.dumps(holoviews.core.util.dimension_sanitizer(XName)), 'YColumn': json.dumps(holoviews.core.util.dimension_sanitizer(YName))}
+    Callback = bokeh.models.CustomJS(args=dict(Source=Source, Sliders=Sliders), code=Code)
+    for Slider in Sliders:
+        Slider.js_on_change('value', Callback)
+    return panel.pane.Bokeh(bokeh.layouts.column(Figure, *Sliders), margin=(0, 0, 0, 0))
@@ -0,0 +1,138 @@
+###############################################################################
+# Copyright (C) 2024 Jacob Barhak
+#
+###############################################################################
+#
+# Feel free to contact the author
+# --
+# Jacob Barhak Ph.D.
+# jacob.barhak@gmail.com
+# http://sites.google.com/site/jacobbarhak/
+#
+#
+# Compact storage of the prediction qualities shown by GeneratePlot.
+# The prediction qualities were pickled as a dictionary of python lists with
+# a tuple of booleans and integers per record, or None for records without a
+# prediction, which takes hundreds of bytes per record on disk and in memory.
+# Here the records of each key are kept in a numpy structured array with a
+# field per value, of the narrowest integer type that holds all its values,
+# and a Valid field that is False for the records that were None. Each array is
+# saved as a .npy file that is memory mapped when loaded, and a small json
+# file lists the keys and their files.
+#
+# Convert pickled prediction qualities with:
+# python QualityStore.py ../PyDataAustin2019/Data/FileName.pckl
+# Each FileName.pckl is kept and FileName.qualities.json with
+# FileName.qualities.<n>.npy is added. LoadQualities loads the converted files
+# if they exist and the pickle otherwise.
+
+
+import io
+import itertools
+import json
+import os
+import sys
+
+import numpy
+
+import DataStore
+
+SidecarExtension = '.qualities.json'
+FormatVersion = 1
+
+ValidField = 'Valid'
+FieldPrefix = 'Quality'
+
+# integer types tried for the values of a field, narrowest first
+IntegerTypes = [numpy.int8, numpy.int16, numpy.int32, numpy.int64]
+
+
+def QualityFields(DType):
+    'Returns the names of the value fields of a structured array type in order'
+    return [Field for Field in DType.names if Field != ValidField]
+
+
+def FieldType(Values):
+    'Returns the narrowest type that holds the values of a field'
+    if len(Values) and numpy.all(Values == numpy.floor(Values)):
+        for IntegerType in IntegerTypes:
+            TypeInfo = numpy.iinfo(IntegerType)
+            if TypeInfo.min <= Values.min() and Values.max() <= TypeInfo.max:
+                return IntegerType
+    if not len(Values):
+        return numpy.int8
+    return numpy.float64
+
+
+def CompactRecords(Records):
+    'Returns a structured array of a list of quality records that may hold None'
+    ValidRecords = [Record for Record in Records if Record is not None]
+    Width = len(ValidRecords[0]) if ValidRecords else 0
+    Values = itertools.chain.from_iterable(ValidRecords)
+    Qualities = numpy.fromiter(Values, dtype=float, count=len(ValidRecords) * Width).reshape(len(ValidRecords), Width)
+    DType = numpy.dtype([(ValidField, numpy.bool_)] + [('%s%i' % (FieldPrefix, Column), FieldType(Qualities[:, Column])) for Column in range(Width)])
+    Compact = numpy.zeros(len(Records), dtype=DType)
+    Valid = numpy.fromiter((Record is not None for Record in Records), dtype=bool, count=len(Records))
+    Compact[ValidField] = Valid
+    for Column in range(Width):
+        Compact['%s%i' % (FieldPrefix, Column)][Valid] = Qualities[:, Column]
+    return Compact
+
+
+def KeySpec(Key):
+    'Returns a json description of a dictionary key'
+    if isinstance(Key, tuple):
+        return list(Key)
+    return Key
+
+
+def MakeKey(Spec):
+    'Returns a dictionary key from its json description'
+    if isinstance(Spec, list):
+        return tuple(MakeKey(Item) for Item in Spec)
+    return Spec
+
+
+def ExportQualities(PredictionQualities, FileName):
+    'Stores prediction qualities as compact arrays with a json sidecar'
+    BaseName = os.path.splitext(FileName)[0]
+    Sidecar = {'Version': FormatVersion, 'Keys': []}
+    FileNames = [BaseName + SidecarExtension]
+    for (Index, Key) in enumerate(sorted(PredictionQualities)):
+        ArrayFileName = '%s.qualities.%i.npy' % (BaseName, Index)
+        numpy.save(ArrayFileName, CompactRecords(PredictionQualities[Key]))
+        Sidecar['Keys'].append([KeySpec(Key), os.path.basename(ArrayFileName)])
+        FileNames.append(ArrayFileName)
+    SidecarFile = io.open(BaseName + SidecarExtension, 'w', encoding='utf-8')
+    SidecarFile.write(json.dumps(Sidecar, indent=1, sort_keys=True, ensure_ascii=False))
+    SidecarFile.close()
+    return FileNames
+
+
+def MapRecords(FileName):
+    'Returns the read only memory mapped records of a .npy file'
+    return numpy.load(FileName, mmap_mode='r')
+
+
+def LoadQualities(DataDir, FileName):
+    'Returns the prediction qualities of a data file - compact arrays if it was converted'
+    SidecarName = os.path.splitext(FileName)[0] + SidecarExtension
+    if not DataStore.Exists(DataDir, SidecarName):
+        return DataStore.LoadPickle(DataDir, FileName)
+    SidecarFile = io.open(DataStore.DataFile(DataDir, SidecarName), 'r', encoding='utf-8')
+    Sidecar = json.load(SidecarFile)
+    SidecarFile.close()
+    if Sidecar.get('Version') != FormatVersion:
+        raise ValueError('Unsupported quality store version in %s' % FileName)
+    return dict((MakeKey(KeySpec), DataStore.CachedLoad(DataDir, ArrayFileName, MapRecords)) for (KeySpec, ArrayFileName) in Sidecar['Keys'])
+
+
+def ConvertPickle(FileName):
+    'Converts pickled prediction qualities to compact arrays next to the pickle'
+    (DirName, BaseName) = os.path.split(FileName)
+    return ExportQualities(DataStore.ReadPickle(DataStore.DataFile(DirName, BaseName)), FileName)
+
+
+if __name__ == '__main__':
+    for PickleFileName in sys.argv[1:]:
+        print('Converted %s to %s' % (PickleFileName, ', '.join(ConvertPickle(PickleFileName))))
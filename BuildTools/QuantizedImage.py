@@ -0,0 +1,87 @@
+###############################################################################
+# Copyright (C) 2024 Jacob Barhak
+#
+###############################################################################
+#
+# Feel free to contact the author
+# --
+# Jacob Barhak Ph.D.
+# jacob.barhak@gmail.com
+# http://sites.google.com/site/jacobbarhak/
+#
+#
+# Quantized images of matrices such as the cluster matrices and weight
+# histories loaded by LoadHoloviewsComponent. The cell values of these images
+# are sent to the browser as 64 or 32 bit floats, although they only pick one
+# of the 256 colors of the color map and the value shown by the hover tool.
+# Here the cells are stored as 8 or 16 bit codes with a scale and offset per
+# image. A code is the number of the color bin of the value, so unless cells are
+# missing the color of every cell is the same as before. Integer values such as
+# cluster numbers that fit in the codes are kept exactly. The hover tool
+# decodes the value of the cell under the mouse in the browser, and the
+# largest difference between a decoded and an original value is printed to
+# the build log. Missing cells take the largest code and are left empty.
+
+
+import bokeh.models
+import numpy
+
+MissingColor = 'rgba(0, 0, 0, 0)'
+
+DecodeCode = '''
+if (value >= %(Missing)i) {
+    return '';
+}
+return (%(Offset)r + value * %(Scale)r).toFixed(%(Digits)i);
+'''
+
+
+def QuantizeValues(Values, DType=numpy.uint8):
+    'Returns the codes, offset, scale, code color limits, missing code and maximum error of an array of values'
+    Values = numpy.asarray(Values, dtype=float)
+    Missing = numpy.isnan(Values)
+    Valid = Values[~Missing]
+    # the largest code marks missing cells when there are any
+    Levels = int(numpy.iinfo(DType).max) + 1 - int(Missing.any())
+    (Low, High) = (float(Valid.min()), float(Valid.max())) if len(Valid) else (0.0, 0.0)
+    Codes = numpy.full(Values.shape, numpy.iinfo(DType).max, dtype=DType)
+    if numpy.all(Valid - Low == numpy.round(Valid - Low)) and High - Low < Levels:
+        (Offset, Scale) = (Low, 1.0)
+        Codes[~Missing] = Valid - Low
+        Limits = (0, High - Low)
+    else:
+        # codes are the numbers of equal bins of the values, the same bins the
+        # colors are picked by, and decode to the centers of the bins
+        Scale = (High - Low) / Levels
+        Offset = Low + Scale / 2.0
+        Codes[~Missing] = numpy.clip(numpy.floor((Valid - Low) / Scale), 0, Levels - 1)
+        Limits = (0, Levels - int(Missing.any()))
+    MaxError = float(numpy.max(numpy.abs(Offset + Codes[~Missing] * Scale - Valid))) if len(Valid) else 0.0
+    return (Codes, Offset, Scale, Limits, Levels, MaxError)
+
+
+def DecodingHover(Element, Offset, Scale, Missing):
+    'Returns a hover tool of an image that shows the decoded value of the cell under the mouse'
+    (XDimension, YDimension) = Element.kdims
+    Digits = 0 if Scale == 1.0 else max(0, 1 - int(numpy.floor(numpy.log10(Scale))))
+    Code = DecodeCode % {'Missing': Missing, 'Offset': float(Offset), 'Scale': float(Scale), 'Digits': Digits}
+    return bokeh.models.HoverTool(
+                        tooltips=[
+                                    (XDimension.pprint_label, '$x'),
+                                    (YDimension.pprint_label, '$y'),
+                                    (Element.vdims[0].pprint_label, '@image{custom}'),
+                                 ],
+                        formatters={'@image': bokeh.models.CustomJSHover(code=Code)},
+                        )
+
+
+def QuantizedElement(Element, Name, DType=numpy.uint8):
+    'Returns a holoviews image with the values of Element stored as codes of DType and reports the quantization error'
+    XValues = Element.dimension_values(0, expanded=False)
+    YValues = Element.dimension_values(1, expanded=False)
+    Values = Element.dimension_values(2, flat=False)
+    (Codes, Offset, Scale, Limits, MissingCode, MaxError) = QuantizeValues(Values, DType)
+    Range = numpy.nanmax(Values) - numpy.nanmin(Values)
+    print('Quantized %s to %s with maximal error %g, %.3f%% of the value range' % (Name, numpy.dtype(DType).name, MaxError, 100.0 * MaxError / Range if Range else 0.0))
+    Quantized = Element.clone((XValues, YValues, Codes))
+    return Quantized.opts(clim=Limits, clipping_colors={'max': MissingColor}, tools=[DecodingHover(Element, Offset, Scale, MissingCode)])
@@ -0,0 +1,124 @@
+###############################################################################
+# Copyright (C) 2024 Jacob Barhak
+#
+###############################################################################
+#
+# Feel free to contact the author
+# --
+# Jacob Barhak Ph.D.
+# jacob.barhak@gmail.com
+# http://sites.google.com/site/jacobbarhak/
+#
+#
+# Embeds each image used more than once in a presentation only once.
+# Every call to ConstractImageLinkAnchor inlines another base64 copy of its
+# image, so an image shown in several sections is stored several times in the
+# same html file. Here the saved html is scanned for repeated image data.
+# Each repeated image is stored once in a script at the top of the page that
+# creates a blob url for it when the page loads. All its uses are replaced by
+# a short reference that the script replaces by the blob url as soon as the
+# image element is added to the page.
+
+
+import hashlib
+import json
+import re
+
+# image data in a src attribute - the quote may be escaped by json or html
+ImageDataPattern = re.compile(r'(src=[&a-z;\\"\']{1,24}?)data:(image/(?:png|webp|jpeg|gif));base64,([A-Za-z0-9+/=]+)')
+
+# an empty data url that makes the browser show nothing without a request
+ReferencePrefix = 'data:,shared-image-'
+
+LoaderTemplate = '''<script type="text/javascript">
+(function() {
+  var images = %(Images)s;
+  var urls = {};
+  var prefix = '%(Prefix)s';
+  function url(key) {
+    if (!(key in urls)) {
+      var text = atob(images[key][1]);
+      var bytes = new Uint8Array(text.length);
+      for (var i = 0; i < text.length; i++) {
+        bytes[i] = text.charCodeAt(i);
+      }
+      urls[key] = URL.createObjectURL(new Blob([bytes], {type: images[key][0]}));
+    }
+    return urls[key];
+  }
+  function replace() {
+    var elements = document.querySelectorAll('img[src^="' + prefix + '"]');
+    for (var i = 0; i < elements.length; i++) {
+      var key = elements[i].getAttribute('src').substring(prefix.length);
+      if (key in images) {
+        elements[i].setAttribute('src', url(key));
+      }
+    }
+  }
+  new MutationObserver(replace).observe(document.documentElement, {childList: true, subtree: true});
+})();
+</script>
+'''
+
+
+def ImageKey(Data):
+    'Returns the short key of base64 image data'
+    return hashlib.sha256(Data.encode('ascii')).hexdigest()[:16]
+
+
+def CountImages(Text, Counts):
+    'Counts the uses of each image in the text - data is kept for repeated images'
+    for Match in ImageDataPattern.finditer(Text):
+        Key = ImageKey(Match.group(3))
+        Entry = Counts.setdefault(Key, [0, Match.group(2), None])
+        Entry[0] += 1
+        if Entry[0] == 2:
+            Entry[2] = Match.group(3)
+    return Counts
+
+
+def SharedImageData(Counts):
+    'Returns a dictionary of [Count, MimeType, Data] of images used more than once'
+    return dict((Key, Entry) for (Key, Entry) in Counts.items() if Entry[0] > 1)
+
+
+def ReplaceSharedImages(Text, Shared):
+    'Replaces the data of shared images in the text by their references'
+    if not Shared:
+        return Text
+
+    def Reference(Match):
+        'Replaces the data of a shared image with its reference'
+        Key = ImageKey(Match.group(3))
+        if Key in Shared:
+            return Match.group(1) + ReferencePrefix + Key
+        return Match.group(0)
+
+    return ImageDataPattern.sub(Reference, Text)
+
+
+def LoaderScript(Shared):
+    'Returns the script that creates the blob urls of the shared images'
+    Images = dict((Key, [MimeType, Data]) for (Key, (Count, MimeType, Data)) in Shared.items())
+    return LoaderTemplate % {'Images': json.dumps(Images, sort_keys=True), 'Prefix': ReferencePrefix}
+
+
+def AddLoader(Html, Shared, Report=True):
+    'Inserts the loader script of the shared images into the html head'
+    if not Shared:
+        return Html
+    Loader = LoaderScript(Shared)
+    if Report:
+        SavedBytes = -len(Loader)
+        for (Key, (Count, MimeType, Data)) in Shared.items():
+            SavedBytes += Count * (len('data:%s;base64,' % MimeType) + len(Data) - len(ReferencePrefix + Key))
+        print('Embedded %i images used %i times once - saved %i bytes' % (len(Shared), sum(Entry[0] for Entry in Shared.values()), SavedBytes))
+    return Html.replace('</head>', Loader + '</head>', 1)
+
+
+def DeduplicateImages(Html, Report=True):
+    'Returns html with images used more than once embedded once'
+    if '</head>' not in Html:
+        return Html
+    Shared = SharedImageData(CountImages(Html, {}))
+    return AddLoader(ReplaceSharedImages(Html, Shared), Shared, Report)
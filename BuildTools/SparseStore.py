@@ -0,0 +1,191 @@
+###############################################################################
+# Copyright (C) 2024 Jacob Barhak
+#
+###############################################################################
+#
+# Feel free to contact the author
+# --
+# Jacob Barhak Ph.D.
+# jacob.barhak@gmail.com
+# http://sites.google.com/site/jacobbarhak/
+#
+#
+# Sparse storage of matrices with named rows and columns such as the unit
+# proximity data shown by GenerateProximityMap. The proximity data was pickled
+# as a (Unit 1, Unit 2, Proximity) record for every pair of units although most
+# pairs have no proximity, and a dense matrix of all the units in
+# ClinicalTrials.gov needs hundreds of GB. Here only the values above a
+# threshold are kept, optionally only the largest values of each row, in
+# compressed sparse row form: the column of every kept value, its value, and
+# the position of the first kept value of each row. The arrays are saved as
+# .npy files that are memory mapped when loaded, and a small json file holds
+# the names of the rows and columns and the value of the cells not kept.
+# The default threshold of 0 only drops the pairs with no proximity, so the
+# matrix drawn from the sparse data is the same as the one drawn before.
+#
+# Convert pickled proximity records with:
+# python SparseStore.py [--threshold T] [--top-k K] ../CDISC2019/Data/FileName.pckl
+# Each FileName.pckl is kept and FileName.sparse.json with
+# FileName.sparse.<n>.npy is added. LoadMatrix loads the converted files if
+# they exist and the pickle otherwise.
+
+
+import argparse
+import io
+import json
+import os
+
+import numpy
+
+import DataStore
+
+SidecarExtension = '.sparse.json'
+FormatVersion = 1
+
+ArrayNames = ['IndPtr', 'Indices', 'Values']
+
+
+class SparseMatrix(object):
+    'Matrix in compressed sparse row form - slicing rows returns them dense'
+
+    def __init__(self, Shape, IndPtr, Indices, Values, Fill=0.0):
+        self.shape = tuple(Shape)
+        self.IndPtr = IndPtr
+        self.Indices = Indices
+        self.Values = Values
+        self.Fill = Fill
+
+    def __getitem__(self, Rows):
+        'Returns a dense array of a slice of rows'
+        (Start, Stop, Step) = Rows.indices(self.shape[0])
+        if Step != 1:
+            raise ValueError('Only consecutive rows of a sparse matrix can be read')
+        Stop = max(Start, Stop)
+        Dense = numpy.full((Stop - Start, self.shape[1]), self.Fill, dtype=numpy.float32)
+        Counts = numpy.diff(self.IndPtr[Start:Stop + 1])
+        RowIndices = numpy.repeat(numpy.arange(Stop - Start), Counts)
+        First = self.IndPtr[Start]
+        Last = self.IndPtr[Stop]
+        Dense[RowIndices, self.Indices[First:Last]] = self.Values[First:Last]
+        return Dense
+
+    def Dense(self):
+        'Returns the whole matrix as a dense array'
+        return self[0:self.shape[0]]
+
+
+def KeptEntries(Values, Threshold, TopK):
+    'Returns a boolean array of the values of a row that are kept'
+    with numpy.errstate(invalid='ignore'):
+        Kept = Values > Threshold
+    if TopK is not None and Kept.sum() > TopK:
+        # ties at the smallest kept value are broken by column order
+        Largest = numpy.argsort(-numpy.where(Kept, Values, -numpy.inf), kind='mergesort')[:TopK]
+        Kept = numpy.zeros(len(Values), dtype=bool)
+        Kept[Largest] = True
+    return Kept
+
+
+def FromRows(Rows, NumberOfColumns, Threshold=0.0, TopK=None, Fill=0.0):
+    'Returns a sparse matrix of the values above Threshold - at most TopK per row - of an iterable of dense rows'
+    IndPtr = [0]
+    Indices = []
+    Values = []
+    for Row in Rows:
+        Row = numpy.asarray(Row, dtype=numpy.float32)
+        Columns = numpy.nonzero(KeptEntries(Row, Threshold, TopK))[0]
+        Indices.append(Columns.astype(numpy.int32))
+        Values.append(Row[Columns])
+        IndPtr.append(IndPtr[-1] + len(Columns))
+    Indices = numpy.concatenate(Indices) if Indices else numpy.zeros(0, dtype=numpy.int32)
+    Values = numpy.concatenate(Values) if Values else numpy.zeros(0, dtype=numpy.float32)
+    return SparseMatrix((len(IndPtr) - 1, NumberOfColumns), numpy.array(IndPtr, dtype=numpy.int64), Indices, Values, Fill)
+
+
+def OrderedNames(Names):
+    'Returns the distinct names in the order of their first appearance'
+    Seen = set()
+    Ordered = []
+    for Name in Names:
+        if Name not in Seen:
+            Seen.add(Name)
+            Ordered.append(Name)
+    return Ordered
+
+
+def RecordRows(RowsOfRecords, NumberOfColumns):
+    'Yields a dense row at a time of lists of (Column, Value) with missing cells for columns without a value'
+    for RowRecords in RowsOfRecords:
+        Row = numpy.full(NumberOfColumns, numpy.nan, dtype=numpy.float32)
+        for (Column, Value) in RowRecords:
+            Row[Column] = Value
+        yield Row
+
+
+def FromRecords(Records, Threshold=None, TopK=None):
+    'Returns the column names, row names and sparse matrix of (Column Name, Row Name, Value) records'
+    ColumnNames = OrderedNames(Record[0] for Record in Records)
+    RowNames = OrderedNames(Record[1] for Record in Records)
+    ColumnIndex = dict((Name, Index) for (Index, Name) in enumerate(ColumnNames))
+    RowIndex = dict((Name, Index) for (Index, Name) in enumerate(RowNames))
+    RowsOfRecords = [[] for RowName in RowNames]
+    for (ColumnName, RowName, Value) in Records:
+        RowsOfRecords[RowIndex[RowName]].append((ColumnIndex[ColumnName], Value))
+    # without a threshold all records are kept and the pairs without a record
+    # are missing, otherwise the values not kept are taken as no proximity
+    Fill = numpy.nan if Threshold is None else 0.0
+    Matrix = FromRows(RecordRows(RowsOfRecords, len(ColumnNames)), len(ColumnNames), -numpy.inf if Threshold is None else Threshold, TopK, Fill)
+    return (ColumnNames, RowNames, Matrix)
+
+
+def ExportMatrix(ColumnNames, RowNames, Matrix, FileName, Threshold, TopK):
+    'Stores a sparse matrix with its names as arrays with a json sidecar'
+    BaseName = os.path.splitext(FileName)[0]
+    Sidecar = {'Version': FormatVersion, 'Shape': list(Matrix.shape), 'Fill': None if numpy.isnan(Matrix.Fill) else Matrix.Fill, 'Threshold': Threshold, 'TopK': TopK, 'ColumnNames': ColumnNames, 'RowNames': RowNames, 'Arrays': []}
+    FileNames = [BaseName + SidecarExtension]
+    for (Index, ArrayName) in enumerate(ArrayNames):
+        ArrayFileName = '%s.sparse.%i.npy' % (BaseName, Index)
+        numpy.save(ArrayFileName, getattr(Matrix, ArrayName))
+        Sidecar['Arrays'].append(os.path.basename(ArrayFileName))
+        FileNames.append(ArrayFileName)
+    SidecarFile = io.open(BaseName + SidecarExtension, 'w', encoding='utf-8')
+    SidecarFile.write(json.dumps(Sidecar, indent=1, sort_keys=True, ensure_ascii=False))
+    SidecarFile.close()
+    return FileNames
+
+
+def MapArray(FileName):
+    'Returns a read only memory mapped array of a .npy file'
+    return numpy.load(FileName, mmap_mode='r')
+
+
+def LoadMatrix(DataDir, FileName):
+    'Returns the column names, row names and sparse matrix of a data file - pickled records if it was not converted'
+    SidecarName = os.path.splitext(FileName)[0] + SidecarExtension
+    if not DataStore.Exists(DataDir, SidecarName):
+        return FromRecords(DataStore.LoadPickle(DataDir, FileName))
+    SidecarFile = io.open(DataStore.DataFile(DataDir, SidecarName), 'r', encoding='utf-8')
+    Sidecar = json.load(SidecarFile)
+    SidecarFile.close()
+    if Sidecar.get('Version') != FormatVersion:
+        raise ValueError('Unsupported sparse store version in %s' % FileName)
+    Arrays = [DataStore.CachedLoad(DataDir, ArrayFileName, MapArray) for ArrayFileName in Sidecar['Arrays']]
+    Fill = numpy.nan if Sidecar['Fill'] is None else Sidecar['Fill']
+    return (Sidecar['ColumnNames'], Sidecar['RowNames'], SparseMatrix(Sidecar['Shape'], *Arrays, Fill=Fill))
+
+
+def ConvertPickle(FileName, Threshold=0.0, TopK=None):
+    'Converts pickled (Column Name, Row Name, Value) records to a sparse matrix next to the pickle'
+    (DirName, BaseName) = os.path.split(FileName)
+    (ColumnNames, RowNames, Matrix) = FromRecords(DataStore.ReadPickle(DataStore.DataFile(DirName, BaseName)), Threshold, TopK)
+    return ExportMatrix(ColumnNames, RowNames, Matrix, FileName, Threshold, TopK)
+
+
+if __name__ == '__main__':
+    Parser = argparse.ArgumentParser(description='Convert pickled proximity records to sparse matrices')
+    Parser.add_argument('PickleFileNames', nargs='+', help='pickle files of (Column Name, Row Name, Value) records')
+    Parser.add_argument('--threshold', type=float, default=0.0, help='keep only values above this threshold - the default drops the zeros')
+    Parser.add_argument('--top-k', type=int, default=None, help='keep only this number of largest values in each row')
+    Arguments = Parser.parse_args()
+    for PickleFileName in Arguments.PickleFileNames:
+        print('Converted %s to %s' % (PickleFileName, ', '.join(ConvertPickle(PickleFileName, Arguments.threshold, Arguments.top_k))))
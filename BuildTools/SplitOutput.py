@@ -0,0 +1,134 @@
+###############################################################################
+# Copyright (C) 2024 Jacob Barhak
+#
+###############################################################################
+#
+# Feel free to contact the author
+# --
+# Jacob Barhak Ph.D.
+# jacob.barhak@gmail.com
+# http://sites.google.com/site/jacobbarhak/
+#
+#
+# Code split output for presentations hosted on the web.
+# A presentation saved with inline resources is a single html file of many MB
+# that must be downloaded completely before anything is shown. In split mode
+# the html file is a small shell that holds only the first tab. The BokehJS
+# code is moved to one content hashed bundle file and the content of every
+# other tab is written to its own content hashed payload file, see
+# LazyTabs.py. Payloads are fetched when their tab is first shown, and the
+# content hash in the file names allows browsers to cache them indefinitely.
+# Split output has to be served over http, browsers do not fetch payloads of
+# a file opened from the local disk, so the single file mode is kept for
+# downloads. In both modes the html file is written by StreamingHTML.py and
+# images used more than once are embedded once, see SharedImages.py. In the
+# single file mode the json items of the inactive tabs are written at the end
+# of the page body, see LazyTabs.py.
+
+
+import hashlib
+import io
+import os
+import re
+
+import LazyTabs
+import SharedImages
+import StreamedAssets
+
+try:
+    import StreamingHTML
+except ImportError:
+    # older bokeh versions cannot render the page apart from the document
+    StreamingHTML = None
+
+# payload files written during this build for each payload directory
+WrittenFiles = {}
+
+HeadPattern = re.compile(r'<head>.*?</head>', re.DOTALL)
+InlineScriptPattern = re.compile(r'[ \t]*<script type="text/javascript">\s*(.*?)\s*</script>\s*?\n', re.DOTALL)
+BundleTemplate = '<script type="text/javascript" src="%s"></script>\n'
+
+
+def PayloadDir(SavedFileName):
+    'Returns the directory that holds the split output of an html file'
+    return os.path.splitext(SavedFileName)[0] + '_files'
+
+
+def WritePayload(DirName, Text, Extension):
+    'Writes text to a content hashed file and returns its url relative to the html file'
+    FileName = hashlib.sha256(Text.encode('utf-8')).hexdigest()[:20] + Extension
+    if not os.path.isdir(DirName):
+        os.makedirs(DirName)
+    PayloadFileName = os.path.join(DirName, FileName)
+    if not os.path.isfile(PayloadFileName):
+        # the payload is streamed rather than held in memory, so it is written
+        # to a temporary file here instead of by AssetCache.WriteFileAtomic
+        TempFileName = '%s.%i.tmp' % (PayloadFileName, os.getpid())
+        PayloadFile = io.open(TempFileName, 'wb')
+        StreamedAssets.WriteText(PayloadFile, Text)
+        PayloadFile.close()
+        try:
+            os.rename(TempFileName, PayloadFileName)
+        except OSError:
+            # another build already wrote the same content
+            os.remove(TempFileName)
+    WrittenFiles.setdefault(os.path.abspath(DirName), set()).add(FileName)
+    return '%s/%s' % (os.path.basename(os.path.normpath(DirName)), FileName)
+
+
+def RemoveStalePayloads(DirName):
+    'Removes payload files of previous builds that this build did not write'
+    Written = WrittenFiles.pop(os.path.abspath(DirName), set())
+    for FileName in os.listdir(DirName):
+        if FileName not in Written:
+            os.remove(os.path.join(DirName, FileName))
+
+
+def SplitScripts(Html, DirName):
+    'Moves the inline scripts of the html head into one bundle file'
+    HeadMatch = HeadPattern.search(Html)
+    if HeadMatch is None:
+        return Html
+    Head = HeadMatch.group(0)
+    Matches = list(InlineScriptPattern.finditer(Head))
+    if not Matches:
+        return Html
+    Scripts = [Match.group(1) for Match in Matches]
+    BundleUrl = WritePayload(DirName, ';\n'.join(Scripts) + ';\n', '.js')
+    # the bundle takes the place of the first script to keep the load order
+    Indent = re.match(r'[ \t]*', Matches[0].group(0)).group(0)
+    Parts = InlineScriptPattern.split(Head)
+    NewHead = Parts[0] + Indent + BundleTemplate % BundleUrl + ''.join(Parts[2::2])
+    return Html[:HeadMatch.start()] + NewHead + Html[HeadMatch.end():]
+
+
+def SavePresentation(Presentation, SavedFileName, Split=False, resources=None, title=None, template=None, template_variables=None):
+    'Saves a panel object as a single html file or as a split output'
+    DirName = PayloadDir(SavedFileName)
+    if StreamingHTML is None:
+        OutputText = io.StringIO()
+        Presentation.save(OutputText, resources=resources, title=title, template=template, template_variables=template_variables)
+        (Html, Marker, DocsJson) = (LazyTabs.AddItemScripts(OutputText.getvalue(), Presentation), None, None)
+        Shared = SharedImages.SharedImageData(SharedImages.CountImages(Html, {}))
+    else:
+        (Html, Marker, DocsJson) = StreamingHTML.RenderPage(Presentation, title, resources, template, template_variables)
+        # the json items of lazy tabs are counted with the images of the page
+        Html = LazyTabs.AddItemScripts(Html, Presentation)
+        Shared = StreamingHTML.FindSharedImages(DocsJson, Html)
+    if Split:
+        Html = SplitScripts(Html, DirName)
+    # the loader of the shared images is added after the scripts were split
+    # to keep the images in the html file
+    Html = SharedImages.AddLoader(SharedImages.ReplaceSharedImages(Html, Shared), Shared)
+    OutFile = io.open(SavedFileName, 'wb')
+    if Marker is None:
+        StreamedAssets.WriteText(OutFile, Html)
+    else:
+        (HtmlStart, HtmlEnd) = Html.split(Marker, 1)
+        StreamedAssets.WriteText(OutFile, HtmlStart)
+        StreamingHTML.WriteDocument(OutFile, DocsJson, Shared)
+        StreamedAssets.WriteText(OutFile, HtmlEnd)
+    OutFile.close()
+    if Split and os.path.isdir(DirName):
+        RemoveStalePayloads(DirName)
+        print('Saved %s with %i payload files in %s' % (SavedFileName, len(os.listdir(DirName)), DirName))
@@ -0,0 +1,51 @@
+###############################################################################
+# Copyright (C) 2024 Jacob Barhak
+#
+###############################################################################
+#
+# Feel free to contact the author
+# --
+# Jacob Barhak Ph.D.
+# jacob.barhak@gmail.com
+# http://sites.google.com/site/jacobbarhak/
+#
+#
+# Streams large embedded files such as videos into the saved presentation.
+# Embedding a video as base64 text used to read the whole file, encode it to a
+# second buffer and copy it again into the html text, so the memory used was a
+# few times the size of the video. Here the presentation only holds a short
+# reference to the file. When the html is written the reference is replaced by
+# the base64 encoding of the file, written block by block, so the memory used
+# does not depend on the size of the file.
+
+
+import os
+import re
+
+import AssetCache
+
+ReferencePrefix = 'streamed-asset-'
+ReferencePattern = re.compile(ReferencePrefix + '([0-9a-f]{64})')
+
+# files referenced by their content hash
+StreamedFiles = {}
+
+
+def StreamedData(FileName):
+    'Returns a reference that is replaced by the base64 encoding of the file when saved'
+    Hash = AssetCache.FileHash(FileName)
+    StreamedFiles[Hash] = os.path.abspath(FileName)
+    return ReferencePrefix + Hash
+
+
+def WriteText(OutFile, Text):
+    'Writes text to a binary file replacing references by the encoded files'
+    Position = 0
+    for Match in ReferencePattern.finditer(Text):
+        FileName = StreamedFiles.get(Match.group(1))
+        if FileName is None:
+            continue
+        OutFile.write(Text[Position:Match.start()].encode('utf-8'))
+        AssetCache.GetSharedCache().StreamEncodedFile(FileName, OutFile)
+        Position = Match.end()
+    OutFile.write(Text[Position:].encode('utf-8'))
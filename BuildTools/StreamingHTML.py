@@ -0,0 +1,102 @@
+###############################################################################
+# Copyright (C) 2024 Jacob Barhak
+#
+###############################################################################
+#
+# Feel free to contact the author
+# --
+# Jacob Barhak Ph.D.
+# jacob.barhak@gmail.com
+# http://sites.google.com/site/jacobbarhak/
+#
+#
+# Writes a presentation to its html file without holding the whole file in
+# memory. Saving with panel serializes the bokeh document with all inlined
+# images and resources to one json string, escapes it to a second string,
+# renders the page template to a third, and only then writes the file. Here
+# the page template is rendered with a short marker in place of the document,
+# and the document json is written in place of the marker one model at a
+# time, so memory holds the page template and a single serialized model.
+
+
+import json
+import uuid
+
+from bokeh.document import Document
+from bokeh.core.json_encoder import serialize_json
+from bokeh.embed.bundle import bundle_for_objs_and_resources
+from bokeh.embed.elements import html_page_for_render_items
+from bokeh.embed.util import OutputDocumentFor, standalone_docs_json_and_render_items
+from bokeh.resources import CDN, INLINE
+
+import SharedImages
+import StreamedAssets
+import TypedColumns
+
+MarkerPrefix = 'streamed-document-'
+
+# containers nested deeper than the models of the document are written whole
+SplitDepth = 4
+
+
+def EscapeHtml(Text):
+    'Escapes text the way bokeh escapes the document json in the page'
+    return Text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def EncodeChunks(Value, Depth=SplitDepth):
+    'Yields the compact bokeh json encoding of a value in pieces'
+    if Depth > 0 and isinstance(Value, dict):
+        yield '{'
+        for (Index, Key) in enumerate(sorted(Value)):
+            yield '%s%s:' % (',' if Index else '', json.dumps(Key))
+            for Chunk in EncodeChunks(Value[Key], Depth - 1):
+                yield Chunk
+        yield '}'
+    elif Depth > 0 and isinstance(Value, list):
+        yield '['
+        for (Index, Item) in enumerate(Value):
+            if Index:
+                yield ','
+            for Chunk in EncodeChunks(Item, Depth - 1):
+                yield Chunk
+        yield ']'
+    else:
+        yield serialize_json(Value)
+
+
+def RenderPage(Presentation, Title=None, Resources=None, Template=None, TemplateVariables=None):
+    'Returns (Html, Marker, DocsJson) where Marker in Html stands for the document json'
+    if Resources is None:
+        Resources = CDN
+    elif Resources in ('inline', 'INLINE'):
+        Resources = INLINE
+    elif Resources in ('cdn', 'CDN'):
+        Resources = CDN
+    BokehDocument = Document()
+    Model = Presentation.get_root(BokehDocument)
+    BokehDocument.add_root(Model)
+    TypedColumns.ReportListColumns(Model, Title or 'the page')
+    Models = BokehDocument.roots
+    with OutputDocumentFor(Models) as OutputDocument:
+        (DocsJson, RenderItems) = standalone_docs_json_and_render_items(Models)
+        Bundle = bundle_for_objs_and_resources([OutputDocument], Resources)
+    Marker = MarkerPrefix + uuid.uuid4().hex
+    Html = html_page_for_render_items(Bundle, Marker, RenderItems, Title or 'Panel', template=Template, template_variables=TemplateVariables or {})
+    return (Html, serialize_json(Marker), DocsJson)
+
+
+def WriteDocument(OutFile, DocsJson, SharedImageData):
+    'Writes the escaped document json to a binary file one model at a time'
+    for Chunk in EncodeChunks(DocsJson):
+        Chunk = SharedImages.ReplaceSharedImages(EscapeHtml(Chunk), SharedImageData)
+        StreamedAssets.WriteText(OutFile, Chunk)
+
+
+def FindSharedImages(DocsJson, Html):
+    'Returns the images used more than once in the page and its document'
+    Counts = {}
+    SharedImages.CountImages(Html, Counts)
+    for Chunk in EncodeChunks(DocsJson):
+        SharedImages.CountImages(Chunk, Counts)
+    return SharedImages.SharedImageData(Counts)
@@ -0,0 +1,281 @@
+###############################################################################
+# Copyright (C) 2024 Jacob Barhak
+#
+###############################################################################
+#
+# Feel free to contact the author
+# --
+# Jacob Barhak Ph.D.
+# jacob.barhak@gmail.com
+# http://sites.google.com/site/jacobbarhak/
+#
+#
+# Zoomable tile pyramid of a large square matrix such as the proximity matrix
+# of all the units in ClinicalTrials.gov. Such a matrix does not fit in a
+# presentation, so the presentations only showed a zoom on a few hundred units.
+# Here the matrix is read from a memory mapped .npy file, or from a sparse
+# matrix, see SparseStore.py, one band of rows at a time and written as
+# colored PNG tiles of 256x256 cells. Each coarser zoom level averages 2x2
+# cells of the level below it, which is kept in a memory mapped file while the
+# next level is computed, so the whole matrix is never held in memory. The tiles of the finest level come with a json file holding
+# the names of their rows and columns and their values in one byte per cell.
+# The presentation shows the tiles with a bokeh tile source that fetches only
+# the tiles in view, and the hover tool fetches the json file of the tile under
+# the mouse, so the pyramid is served as static files next to the presentation.
+#
+# Build a pyramid with:
+# python TilePyramid.py Matrix.npy OutputDir --names Names.json
+# where Matrix.npy holds a square matrix of values between 0 and 1 with the
+# first row drawn at the bottom, and Names.json lists the names of its rows,
+# or with the data file of a sparse matrix converted by SparseStore.py:
+# python TilePyramid.py ../CDISC2019/Data/FileName.pckl OutputDir
+
+
+import argparse
+import base64
+import io
+import json
+import math
+import os
+import shutil
+import tempfile
+
+import bokeh.models
+import bokeh.plotting
+import matplotlib.cm
+import numpy
+
+import SparseStore
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+TileSize = 256
+PyramidFileName = 'Pyramid.json'
+HoverDirName = 'hover'
+FormatVersion = 1
+
+# byte of cells without a value in the hover tiles - values use the others
+MissingByte = 255
+
+HoverCode = '''
+var Cache = window.TilePyramidHover = window.TilePyramidHover || {};
+var Column = Math.floor(special_vars.x);
+var Row = Math.floor(special_vars.y);
+if (Column < 0 || Row < 0 || Column >= %(Size)i || Row >= %(Size)i) {
+    return '';
+}
+var TileX = Math.floor(Column / %(TileSize)i);
+var TileY = Math.floor(Row / %(TileSize)i);
+var Url = %(UrlPrefix)s + '/%(HoverDirName)s/' + TileX + '/' + TileY + '.json';
+if (!(Url in Cache)) {
+    Cache[Url] = null;
+    var Request = new XMLHttpRequest();
+    Request.onload = function () {
+        var Tile = JSON.parse(Request.responseText);
+        Tile.Bytes = atob(Tile.Values);
+        Cache[Url] = Tile;
+    };
+    Request.open('GET', Url);
+    Request.send();
+}
+var Tile = Cache[Url];
+if (Tile === null) {
+    return '...';
+}
+var TileColumn = Column - TileX * %(TileSize)i;
+var TileRow = Row - TileY * %(TileSize)i;
+var Part = '%(Part)s';
+if (Part == 'Column') {
+    return Tile.Columns[TileColumn];
+}
+if (Part == 'Row') {
+    return Tile.Rows[TileRow];
+}
+var Byte = Tile.Bytes.charCodeAt(TileRow * Tile.Columns.length + TileColumn);
+if (Byte == %(MissingByte)i) {
+    return '';
+}
+return (%(Low)r + Byte * %(Step)r).toFixed(3);
+'''
+
+
+def ZoomLevels(Size):
+    'Returns the number of zoom levels needed for the finest level to show every cell'
+    Levels = 1
+    while TileSize * 2 ** (Levels - 1) < Size:
+        Levels += 1
+    return Levels
+
+
+def HalveLevel(Level, FileName):
+    'Returns a memory mapped level averaging each 2x2 cells of a level without the missing ones'
+    (Rows, Columns) = Level.shape
+    Halved = numpy.lib.format.open_memmap(FileName, mode='w+', dtype=numpy.float32, shape=((Rows + 1) // 2, (Columns + 1) // 2))
+    for Start in range(0, Rows, 2 * TileSize):
+        Band = numpy.array(Level[Start:Start + 2 * TileSize], dtype=numpy.float32)
+        # odd sizes are padded with missing cells
+        Padded = numpy.full((Band.shape[0] + Band.shape[0] % 2, Columns + Columns % 2), numpy.nan, dtype=numpy.float32)
+        Padded[:Band.shape[0], :Columns] = Band
+        Blocks = Padded.reshape(Padded.shape[0] // 2, 2, Padded.shape[1] // 2, 2)
+        Valid = ~numpy.isnan(Blocks)
+        Sums = numpy.where(Valid, Blocks, 0).sum(axis=(1, 3))
+        Counts = Valid.sum(axis=(1, 3))
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            Halved[Start // 2:Start // 2 + Sums.shape[0]] = Sums / Counts
+    Halved.flush()
+    return Halved
+
+
+def ColorTable(ColorMapName):
+    'Returns the RGBA bytes of the 256 colors of a matplotlib color map'
+    return (matplotlib.cm.get_cmap(ColorMapName)(numpy.arange(256)) * 255).round().astype(numpy.uint8)
+
+
+def ColorTile(Values, Table, Low, High):
+    'Returns a PNG image of the colors of a block of values padded to a tile'
+    Missing = numpy.isnan(Values)
+    with numpy.errstate(invalid='ignore'):
+        Indices = numpy.clip((numpy.where(Missing, Low, Values) - Low) / (High - Low) * 255, 0, 255).astype(numpy.uint8)
+    Colors = numpy.zeros((TileSize, TileSize, 4), dtype=numpy.uint8)
+    Colors[:Values.shape[0], :Values.shape[1]] = Table[Indices]
+    Colors[:Values.shape[0], :Values.shape[1]][Missing] = 0
+    # the first row of a tile is at its bottom and the first row of an image at its top
+    return Image.fromarray(Colors[::-1], 'RGBA')
+
+
+def TileFileName(LevelDir, TileX, TileY, Extension):
+    'Returns the file name of a tile of a level making its directory'
+    DirName = os.path.join(LevelDir, str(TileX))
+    if not os.path.isdir(DirName):
+        os.makedirs(DirName)
+    return os.path.join(DirName, '%i%s' % (TileY, Extension))
+
+
+def WriteLevelTiles(Level, Zoom, OutputDir, Table, Low, High):
+    'Writes the colored tiles of a zoom level one band of rows at a time'
+    (Rows, Columns) = Level.shape
+    for TileY in range(int(math.ceil(Rows / float(TileSize)))):
+        Band = numpy.array(Level[TileY * TileSize:(TileY + 1) * TileSize], dtype=numpy.float32)
+        for TileX in range(int(math.ceil(Columns / float(TileSize)))):
+            Values = Band[:, TileX * TileSize:(TileX + 1) * TileSize]
+            ColorTile(Values, Table, Low, High).save(TileFileName(os.path.join(OutputDir, str(Zoom)), TileX, TileY, '.png'), optimize=True)
+
+
+def HoverBytes(Values, Low, High):
+    'Returns the values of a block as one byte per cell'
+    Missing = numpy.isnan(Values)
+    with numpy.errstate(invalid='ignore'):
+        Bytes = numpy.clip(numpy.round((numpy.where(Missing, Low, Values) - Low) / (High - Low) * (MissingByte - 1)), 0, MissingByte - 1).astype(numpy.uint8)
+    Bytes[Missing] = MissingByte
+    return Bytes
+
+
+def WriteHoverTiles(Matrix, Names, OutputDir, Low, High):
+    'Writes the names and values of the cells of each tile of the finest level as json'
+    Size = len(Names)
+    for TileY in range(int(math.ceil(Size / float(TileSize)))):
+        Band = numpy.array(Matrix[TileY * TileSize:(TileY + 1) * TileSize], dtype=numpy.float32)
+        for TileX in range(int(math.ceil(Size / float(TileSize)))):
+            Values = Band[:, TileX * TileSize:(TileX + 1) * TileSize]
+            Tile = {'Columns': Names[TileX * TileSize:(TileX + 1) * TileSize], 'Rows': Names[TileY * TileSize:(TileY + 1) * TileSize]}
+            Tile['Values'] = base64.b64encode(HoverBytes(Values, Low, High).tobytes()).decode('ascii')
+            TileFile = io.open(TileFileName(os.path.join(OutputDir, HoverDirName), TileX, TileY, '.json'), 'w', encoding='utf-8')
+            TileFile.write(json.dumps(Tile, ensure_ascii=False))
+            TileFile.close()
+
+
+def BuildPyramid(Matrix, Names, OutputDir, ColorMapName='BuPu', Low=0.0, High=1.0):
+    'Writes the tile pyramid of a square matrix - a memory mapped or sparse matrix read by rows - with its row names and returns the number of zoom levels'
+    if Image is None:
+        raise ImportError('Pillow is needed to write the tiles of a pyramid')
+    if Matrix.shape != (len(Names), len(Names)):
+        raise ValueError('The matrix is not a square matrix with a row per name')
+    Levels = ZoomLevels(len(Names))
+    Table = ColorTable(ColorMapName)
+    WriteHoverTiles(Matrix, Names, OutputDir, Low, High)
+    WriteLevelTiles(Matrix, Levels - 1, OutputDir, Table, Low, High)
+    # coarser levels are computed from the level below kept in a scratch directory
+    ScratchDir = tempfile.mkdtemp()
+    try:
+        Level = Matrix
+        for Zoom in range(Levels - 2, -1, -1):
+            Level = HalveLevel(Level, os.path.join(ScratchDir, 'Level%i.npy' % Zoom))
+            WriteLevelTiles(Level, Zoom, OutputDir, Table, Low, High)
+        del Level
+    finally:
+        shutil.rmtree(ScratchDir, ignore_errors=True)
+    Pyramid = {'Version': FormatVersion, 'Size': len(Names), 'TileSize': TileSize, 'Levels': Levels, 'Low': Low, 'High': High, 'ColorMap': ColorMapName}
+    PyramidFile = io.open(os.path.join(OutputDir, PyramidFileName), 'w', encoding='utf-8')
+    PyramidFile.write(json.dumps(Pyramid, indent=1, sort_keys=True, ensure_ascii=False))
+    PyramidFile.close()
+    return Levels
+
+
+def Exists(PyramidDir):
+    'Returns True if a pyramid was built in a directory'
+    return os.path.isfile(os.path.join(PyramidDir, PyramidFileName))
+
+
+def ReadPyramid(PyramidDir):
+    'Returns the description of a pyramid'
+    PyramidFile = io.open(os.path.join(PyramidDir, PyramidFileName), 'r', encoding='utf-8')
+    Pyramid = json.load(PyramidFile)
+    PyramidFile.close()
+    if Pyramid.get('Version') != FormatVersion:
+        raise ValueError('Unsupported tile pyramid version in %s' % PyramidDir)
+    return Pyramid
+
+
+def PyramidHover(Pyramid, UrlPrefix, Labels):
+    'Returns a hover tool showing the names and value of the cell under the mouse from the hover tiles'
+    (ColumnLabel, RowLabel, ValueLabel) = Labels
+    CodeValues = {'Size': Pyramid['Size'], 'TileSize': Pyramid['TileSize'], 'UrlPrefix': json.dumps(UrlPrefix), 'HoverDirName': HoverDirName, 'MissingByte': MissingByte, 'Low': float(Pyramid['Low']), 'Step': (Pyramid['High'] - Pyramid['Low']) / float(MissingByte - 1)}
+    Formatters = {}
+    for (Spec, Part) in [('$x', 'Column'), ('$y', 'Row'), ('$index', 'Value')]:
+        CodeValues['Part'] = Part
+        Formatters[Spec] = bokeh.models.CustomJSHover(code=HoverCode % CodeValues)
+    return bokeh.models.HoverTool(tooltips=[(ColumnLabel, '$x{custom}'), (RowLabel, '$y{custom}'), (ValueLabel, '$index{custom}')], formatters=Formatters)
+
+
+def PyramidFigure(PyramidDir, UrlPrefix, Title, Labels, Width, Height):
+    'Returns a figure showing the tiles of a pyramid fetched from UrlPrefix relative to the presentation'
+    Pyramid = ReadPyramid(PyramidDir)
+    Size = Pyramid['Size']
+    Figure = bokeh.plotting.figure(title=Title, x_range=(0, Size), y_range=(0, Size), width=Width, height=Height, tools='pan,wheel_zoom,reset', active_scroll='wheel_zoom', match_aspect=True)
+    # a cell of the finest level is one unit, the tiles start at the origin
+    # and a tile of the coarsest level covers all cells
+    TileSource = bokeh.models.TMSTileSource(url=UrlPrefix + '/{Z}/{X}/{Y}.png', tile_size=Pyramid['TileSize'], min_zoom=0, max_zoom=Pyramid['Levels'] - 1, initial_resolution=2.0 ** (Pyramid['Levels'] - 1), x_origin_offset=0, y_origin_offset=0, wrap_around=False)
+    Figure.add_tile(TileSource)
+    # the tiles cannot be hovered so an invisible cell covering the matrix is
+    Cover = Figure.quad(left=[0], right=[Size], bottom=[0], top=[Size], fill_alpha=0, line_alpha=0)
+    Hover = PyramidHover(Pyramid, UrlPrefix, Labels)
+    Hover.renderers = [Cover]
+    Figure.add_tools(Hover)
+    Figure.toolbar.logo = None
+    Figure.xaxis.visible = False
+    Figure.yaxis.visible = False
+    Figure.grid.visible = False
+    return Figure
+
+
+if __name__ == '__main__':
+    Parser = argparse.ArgumentParser(description='Build the tile pyramid of a large square matrix')
+    Parser.add_argument('MatrixFileName', help='.npy file of the matrix or the data file of a sparse matrix, see SparseStore.py')
+    Parser.add_argument('OutputDir', help='directory of the tiles')
+    Parser.add_argument('--names', default=None, help='json list of the row names of a .npy matrix')
+    Parser.add_argument('--color-map', default='BuPu', help='matplotlib color map of the tiles')
+    Arguments = Parser.parse_args()
+    if Arguments.MatrixFileName.endswith('.npy'):
+        Matrix = numpy.load(Arguments.MatrixFileName, mmap_mode='r')
+        NamesFile = io.open(Arguments.names, 'r', encoding='utf-8')
+        Names = json.load(NamesFile)
+        NamesFile.close()
+    else:
+        (DirName, BaseName) = os.path.split(Arguments.MatrixFileName)
+        (ColumnNames, Names, Matrix) = SparseStore.LoadMatrix(DirName, BaseName)
+        if ColumnNames != Names:
+            raise ValueError('The rows and columns of %s are not the same units' % Arguments.MatrixFileName)
+    print('Wrote %i zoom levels to %s' % (BuildPyramid(Matrix, Names, Arguments.OutputDir, Arguments.color_map), Arguments.OutputDir))
@@ -0,0 +1,113 @@
+###############################################################################
+# Copyright (C) 2024 Jacob Barhak
+#
+###############################################################################
+#
+# Feel free to contact the author
+# --
+# Jacob Barhak Ph.D.
+# jacob.barhak@gmail.com
+# http://sites.google.com/site/jacobbarhak/
+#
+#
+# Plot data sent to the browser as typed arrays.
+# Bokeh writes a column of a data source as a base64 encoded typed array only
+# if it is a numpy array of 8, 16 or 32 bit integers or of floats. Python
+# lists and arrays of other types such as 64 bit integers or booleans are
+# written as json lists of numbers, which are larger and slower to write and
+# to parse in the browser. NarrowestArray converts plot data to a contiguous
+# array of the narrowest of these types that holds the values exactly.
+# ReportListColumns is called when a presentation or a tab is serialized and
+# prints the numeric columns that will still be written as json lists to the
+# build log. Columns of strings have no typed array and columns of a single
+# number, such as the position of an image, gain nothing from one, so neither
+# are reported.
+
+
+import collections
+import numbers
+
+import bokeh.models
+import numpy
+
+from bokeh.util.serialization import array_encoding_disabled, convert_datetime_array
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+# shorter columns are not reported
+MinimumLength = 2
+
+IntegerTypes = [numpy.uint8, numpy.int8, numpy.uint16, numpy.int16, numpy.uint32, numpy.int32]
+
+
+def NarrowestArray(Values):
+    'Returns a contiguous array of the narrowest type bokeh encodes as a typed array that holds the values exactly'
+    Array = numpy.asarray(Values)
+    if Array.dtype.kind == 'b':
+        return numpy.ascontiguousarray(Array, dtype=numpy.uint8)
+    if Array.dtype.kind in 'iu':
+        (Low, High) = (Array.min(), Array.max()) if Array.size else (0, 0)
+        for DType in IntegerTypes:
+            Limits = numpy.iinfo(DType)
+            if Limits.min <= Low and High <= Limits.max:
+                return numpy.ascontiguousarray(Array, dtype=DType)
+        return numpy.ascontiguousarray(Array, dtype=numpy.float64)
+    if Array.dtype.kind == 'f':
+        Narrow = Array.astype(numpy.float32)
+        with numpy.errstate(invalid='ignore'):
+            Exact = numpy.all((Narrow == Array) | numpy.isnan(Array))
+        return numpy.ascontiguousarray(Narrow if Exact else Array, dtype=numpy.float32 if Exact else numpy.float64)
+    return Array
+
+
+def IsNumber(Value):
+    'Returns True for numbers and False for strings, dates and other objects'
+    return isinstance(Value, (numbers.Number, numpy.number)) and not isinstance(Value, bool)
+
+
+def ListType(Column):
+    'Returns the type of the numbers of a column that bokeh writes as a json list, or None'
+    if pandas is not None and isinstance(Column, (pandas.Series, pandas.Index)):
+        Column = Column.values
+    if isinstance(Column, numpy.ndarray):
+        if Column.dtype.kind in 'OUS':
+            Column = Column.tolist()
+        elif array_encoding_disabled(convert_datetime_array(Column)):
+            return Column.dtype.name
+        else:
+            return None
+    if not isinstance(Column, (list, tuple)):
+        return None
+    if all(isinstance(Item, numpy.ndarray) for Item in Column):
+        # bokeh encodes each array of a column of arrays on its own
+        Types = [ListType(Item) for Item in Column]
+        return ([Type for Type in Types if Type] or [None])[0]
+    if len(Column) >= MinimumLength and all(IsNumber(Item) for Item in Column):
+        return 'list'
+    if Column and all(isinstance(Item, (list, tuple)) for Item in Column):
+        return ([Type for Type in map(ListType, Column) if Type] or [None])[0]
+    return None
+
+
+def ListColumns(Root):
+    'Returns a counter of the (Column Name, Type) of the numeric data source columns of a bokeh model written as json lists'
+    Counts = collections.Counter()
+    for Model in Root.references():
+        if isinstance(Model, bokeh.models.ColumnDataSource):
+            for (Name, Column) in Model.data.items():
+                Type = ListType(Column)
+                if Type is not None:
+                    Counts[(Name, Type)] += 1
+    return Counts
+
+
+def ReportListColumns(Root, Name):
+    'Prints the numeric data source columns of a bokeh model that will be written as json lists'
+    Counts = ListColumns(Root)
+    if Counts:
+        Columns = ['%s (%s) x%i' % (ColumnName, Type, Count) for ((ColumnName, Type), Count) in sorted(Counts.items())]
+        print('Data source columns of %s written as json lists: %s' % (Name, ', '.join(Columns)))
+    return Counts
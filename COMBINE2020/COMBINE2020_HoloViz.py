@@ -27,7 +27,6 @@
 
 import bokeh
 import panel
-import base64
 import os
 import sys
 import collections
@@ -40,6 +39,11 @@ import math
 from bokeh.resources import INLINE
 from matplotlib.cm import  PuBu, PuRd, Greens
 
+# shared build tools are kept in the BuildTools directory of the repository
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'BuildTools'))
+import AssetCache
+import ParametricCurve
+
 
 default_width = 1100
 
@@ -48,10 +52,7 @@ data_dir = 'Data'
 
 def convert_file_to_data(file_name):
     "Convert file to data that can be used in html"
-    data_file = open(file_name,'rb')
-    data = data_file.read()
-    data_file.close()
-    return base64.b64encode(data).decode()
+    return AssetCache.EncodeFile(file_name)
 
 def constract_image_link_anchor(link, image_file_name, text, width):
     "Constructs html to describe the png image and link it"
@@ -163,20 +164,17 @@ Plots can be combined by merging them together into complex plots
 
 """, width=700, height=500)
 
-def sine_curve(phase, freq, elevation):
-    xvals = [0.1* i for i in range(100)]
-    yvals = [math.sin(phase+freq*x) + elevation for x in xvals]
-    data = {'xvals': xvals, 'yvals': yvals}
-    return holoviews.Points(data, kdims=['xvals','yvals'])
+sine_formula = 'sin(phase+frequency*xvals) + elevation'
+xvals = [0.1* i for i in range(100)]
 
 holoviews.extension ('bokeh')
-frequencies = [0.5+i*0.25 for i in range(4)] 
-phases      = [i*math.pi/2 for i in range(4)]
-elevations  = [i*0.1 for i in range(4)]
-curve_dict = {(p,f,v): sine_curve(p,f,v) for p in phases for f in frequencies for v in elevations}
+# the sliders take the values of the former HoloMap of 4x4x4 curves and the
+# curve is computed in the browser, so the page holds a single curve
+parameters = [('phase', 0, 3*math.pi/2, math.pi/2),
+              ('frequency', 0.5, 1.25, 0.25),
+              ('elevation', 0, 0.3, 0.1)]
 
-hmap = holoviews.HoloMap(curve_dict, kdims=['phase', 'frequency', 'elevation']).opts(height=150,width=150, toolbar=None, default_tools=[])
-section2_right = panel.panel(hmap, width=350, height=350, widget_location='bottom')
+section2_right = ParametricCurve.ParametricPoints(sine_formula, 'xvals', xvals, 'yvals', parameters, height=150, width=150, toolbar=None, default_tools=[])
 
 
 section2 = panel.Row(section2_left, section2_right)
@@ -46,19 +46,30 @@
 
 import bokeh
 import panel
-import base64
 import os
 import sys
 import numpy
 import holoviews
 import pandas
 
+# shared build tools are kept in the BuildTools directory of the repository
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'BuildTools'))
+import AssetCache
+import ImageOptimizer
+import LazyTabs
+import SplitOutput
+import StreamedAssets
+import TypedColumns
+
 holoviews.extension('bokeh')
 
 EmbedVideo = False
 if len(sys.argv)>1:
     EmbedVideo = 'EmbedVideo' in sys.argv[1:]
 
+LazyTabMode = 'EagerTabs' not in sys.argv[1:]
+SplitOutputMode = 'SplitOutput' in sys.argv[1:]
+
 ImageDir = 'Images'
 CommonResourceDir = 'https://jacob-barhak.github.io/CommonResources/'
 ExternalResourcesIMAG2019 = 'https://jacob-barhak.github.io/PosterIMAG2019Resources/'
@@ -67,17 +78,14 @@ ExternalResourcesIMAG2019 = 'https://jacob-barhak.github.io/PosterIMAG2019Resour
 
 def CovertFileToData(FileName):
     "Convert file to data that can be used in html"
-    DataFile = open(FileName,'rb')
-    Data = DataFile.read()
-    DataFile.close()
-    EncodedData=base64.b64encode(Data)
+    EncodedData = AssetCache.EncodeFile(FileName)
     return EncodedData
     
 
 def ConstractImageLinkAnchor(Link, ImageFileName, Text, Width):
-    'Constructs html to describe the png image and link it'
-    EncodedImage=  CovertFileToData (ImageDir+os.sep+ImageFileName)
-    RetStr = '<a title="%s" target="_blank" href="%s"><img src="data:image/png;base64,%s" alt="%s" width="%i"/> </a>'%(Text,Link,EncodedImage,Text,Width)
+    'Constructs html to describe the image and link it'
+    (ImageType, EncodedImage) = ImageOptimizer.EncodeImage(ImageDir+os.sep+ImageFileName, Width)
+    RetStr = '<a title="%s" target="_blank" href="%s"><img src="data:%s;base64,%s" alt="%s" width="%i"/> </a>'%(Text,Link,ImageType,EncodedImage,Text,Width)
     return RetStr
 
 
@@ -91,7 +99,8 @@ def ObjectInlineHTML(ExtrnalFileName,Width=1200,Height=700):
 def VideoInlineHTML(ExtrnalFileName,Width=1200,Height=700, EmbedVideo = EmbedVideo):
     'Encodes html from a file into video'
     if EmbedVideo:
-        ExtrnalData = CovertFileToData(ExtrnalFileName)
+        # the encoded video is streamed into the file when the presentation is saved
+        ExtrnalData = StreamedAssets.StreamedData(ExtrnalFileName)
         RetStr = '<Video width="%i" height="%i" controls>   <source src="%s" type="video/mp4">  Warning:%s could not be included! </Video>'%(Width, Height, 'data:video/mp4;base64,'+ExtrnalData,ExtrnalFileName)
     else:
         RetStr = '<Video width="%i" height="%i" controls>   <source src="%s" type="video/mp4">  Warning:%s could not be included! </Video>'%(Width, Height, ExtrnalFileName,ExtrnalFileName)
@@ -305,7 +314,7 @@ for (DataFile,PlotTitle) in zip(DataFiles, PlotTitles):
     LactateMean = numpy.mean(InitialPopulationLactateData)
     LactateSTD = numpy.std(InitialPopulationLactateData)
     Frequences, Edges = numpy.histogram(InitialPopulationLactateData, bins = 60, range = (0,15), density = False)
-    Histogram = holoviews.Histogram((Edges, Frequences)).redim.label(x='Lactate mmol/L' ,  Frequency = 'Count').opts(tools = ['hover'], title = PlotTitle, ylim =(0,25), height=350 , width=350 )    
+    Histogram = holoviews.Histogram((TypedColumns.NarrowestArray(Edges), TypedColumns.NarrowestArray(Frequences))).redim.label(x='Lactate mmol/L' ,  Frequency = 'Count').opts(tools = ['hover'], title = PlotTitle, ylim =(0,25), height=350 , width=350 )    
     Stats = holoviews.Spikes([LactateMean - LactateSTD, LactateMean, LactateMean + LactateSTD]).redim.label(x='Lactate mmol/L (Mean +- STD)').opts(tools = ['hover'], color = 'red', spike_length=20)
     CombinedPlot = (Stats*Histogram)    
     if Histograms is None:
@@ -335,8 +344,10 @@ for (DataFile,PlotTitle) in zip(DataFiles, PlotTitles):
     InitialPopulationLactateData = list(Data[Data.Death_Entered==1].Time)
     Frequences, Edges = numpy.histogram(InitialPopulationLactateData, bins = [0.5 + Enum for Enum in range(TimeRangeSize+1)], density = False)
     
-    FrequenceBars = [ (Time+1, Count) for (Time,Count) in enumerate(Frequences)] 
-    AccumualtedFrequenceBars =  [ (Time+1, sum(Frequences[:Time+1])) for Time in range(TimeRangeSize)] 
+    # bars are passed as typed arrays rather than lists of numbers
+    DeathDays = TypedColumns.NarrowestArray(numpy.arange(1, TimeRangeSize+1))
+    FrequenceBars = (DeathDays, TypedColumns.NarrowestArray(Frequences))
+    AccumualtedFrequenceBars = (DeathDays, TypedColumns.NarrowestArray(numpy.cumsum(Frequences)))
     Bars = holoviews.Histogram(FrequenceBars).redim.label(x='Death Day' ,  Frequency = 'Death this day').opts( tools = ['hover'], color='blue', alpha=0.8, title = PlotTitle, ylim =(0,100), height=350 , width=350 ) #, fontsize={ 'xticks': 5})
     AccumualtedBars = holoviews.Histogram(AccumualtedFrequenceBars).redim.label(x='Death Day' ,  Frequency = 'Cumulative deaths').opts( tools = ['hover'], color='red' , alpha=0.2)  #, fontsize={ 'xticks': 5})
     CombinedPlot = (AccumualtedBars * Bars)    
@@ -665,7 +676,12 @@ Section5 =  Section5SlideSelectorTab
 
 TitleHTML = 'GE Healthcare 2019 presentation by Jacob Barhak'
 
-SectionSelectorTab = panel.layout.Tabs (
+SavedFileName = 'Presentation_GE_Healthcare2019.html'
+PayloadDir = None
+if SplitOutputMode:
+    PayloadDir = SplitOutput.PayloadDir(SavedFileName)
+
+SectionSelectorTab = LazyTabs.Tabs (
                                         ('Preface',Section0),
                                         ('(1) Modeling Populations',Section1),
                                         ('(2) Sepsis Model Prototype',Section2),
@@ -673,6 +689,8 @@ SectionSelectorTab = panel.layout.Tabs (
                                         ('(4) ClinicalUnitMapping.com',Section4),
                                         ('(5) Summary',Section5),
 										margin = (0,0,0,0),
+                                        lazy = LazyTabMode,
+                                        payload_dir = PayloadDir,
                                         )
    
 
@@ -681,5 +699,5 @@ SectionSelectorTab = panel.layout.Tabs (
                                         
 Presentation = panel.Column(PresentationHeader, SectionSelectorTab)
 from bokeh.resources import INLINE
-Presentation.save('Presentation_GE_Healthcare2019.html', resources=INLINE)       
+SplitOutput.SavePresentation(Presentation, SavedFileName, SplitOutputMode, resources=INLINE)       
 
@@ -40,6 +40,15 @@ from bokeh.models import HoverTool
 from bokeh.models import CustomJSHover
 import re
 
+# shared build tools are kept in the BuildTools directory of the repository
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'BuildTools'))
+import AssetCache
+import ImageOptimizer
+import BokehEmbed
+import LazyTabs
+import SplitOutput
+import StreamedAssets
+
 
 holoviews.extension('bokeh')
 panel.extension(safe_embed=True)
@@ -50,6 +59,10 @@ if len(sys.argv)>1:
     EmbedVideo = 'EmbedVideo' in sys.argv[1:]
     LocalFiles = 'LocalFiles' in sys.argv[1:]
     
+SharedBokehJS = 'StandaloneResources' not in sys.argv[1:]
+LazyTabMode = 'EagerTabs' not in sys.argv[1:]
+SplitOutputMode = 'SplitOutput' in sys.argv[1:]
+
 Width = 1100
 
 ImageDir = 'Images'
@@ -60,16 +73,13 @@ ResourceDir = 'Resources'
 
 def CovertFileToData(FileName):
     "Convert file to data that can be used in html"
-    DataFile = open(FileName,'rb')
-    Data = DataFile.read()
-    DataFile.close()
-    EncodedData=base64.b64encode(Data)
+    EncodedData = AssetCache.EncodeFile(FileName)
     return EncodedData
     
 def ConstractImageLinkAnchor(Link, ImageFileName, Text, Width):
-    'Constructs html to describe the png image and link it'
-    EncodedImage=  CovertFileToData (ImageDir+os.sep+ImageFileName)
-    RetStr = '<a title="%s" target="_blank" href="%s"><img src="data:image/png;base64,%s" alt="%s" width="%i"/> </a>'%(Text,Link,EncodedImage,Text,Width)
+    'Constructs html to describe the image and link it'
+    (ImageType, EncodedImage) = ImageOptimizer.EncodeImage(ImageDir+os.sep+ImageFileName, Width)
+    RetStr = '<a title="%s" target="_blank" href="%s"><img src="data:%s;base64,%s" alt="%s" width="%i"/> </a>'%(Text,Link,ImageType,EncodedImage,Text,Width)
     return RetStr
 
 def ObjectExternalHTML(ExtrnalFileName,Width=Width,Height=700):
@@ -83,13 +93,19 @@ def ObjectInlineHTML(ExtrnalFileName,Width=Width,Height=700):
     DataFile = open(ExtrnalFileName,'rb')
     Data = DataFile.read()
     DataFile.close()
+    if SharedBokehJS:
+        # render the bokeh document of the file using the BokehJS of the presentation
+        EmbeddedData = BokehEmbed.EmbedBokehDocument(Data, ExtrnalFileName)
+        if EmbeddedData is not None:
+            Data = EmbeddedData
     Figure_4 = panel.pane.HTML(Data, width=Width, height=Height)
     return Figure_4
 
 def VideoInlineHTML(ExtrnalFileName,Width=Width,Height=700, EmbedVideo = EmbedVideo):
     'Encodes html from a file into video'
     if EmbedVideo:
-        ExtrnalData = CovertFileToData(ExtrnalFileName)
+        # the encoded video is streamed into the file when the presentation is saved
+        ExtrnalData = StreamedAssets.StreamedData(ExtrnalFileName)
         RetStr = '<Video width="%i" height="%i" controls>   <source src="%s" type="video/mp4">  Warning:%s could not be included! </Video>'%(Width, Height, 'data:video/mp4;base64,'+ExtrnalData,ExtrnalFileName)
     else:
         RetStr = '<Video width="%i" height="%i" controls>   <source src="%s" type="video/mp4">  Warning:%s could not be included! </Video>'%(Width, Height, ExtrnalFileName,ExtrnalFileName)
@@ -497,7 +513,11 @@ This presentation is accessible [here](%s). The code that generated the presenta
 
 Section10 = panel.Column( panel.Row(Section10_1,PresentationURL, margin = (0,0,0,0)), Section10SummaryText, margin = (0,0,0,0))
 
-SectionSelectorTab = panel.layout.Tabs (
+PayloadDir = None
+if SplitOutputMode:
+    PayloadDir = SplitOutput.PayloadDir(SavedFileName)
+
+SectionSelectorTab = LazyTabs.Tabs (
                                         ('Abstract',Section0),
                                         ('Introduction', Section1),
                                         ('Infectiousness', Section2),
@@ -510,10 +530,12 @@ SectionSelectorTab = panel.layout.Tabs (
                                         ('Future Work', Section9),
                                         ('Conclusions', Section10),
                                         margin = (0,0,0,0), 
+                                        lazy = LazyTabMode,
+                                        payload_dir = PayloadDir,
                                         )
 #Section6References = panel.panel(ReferencesText, width=Width, height=None)
 
                                        
 Presentation = panel.Column(PresentationHeader, SectionSelectorTab)
-Presentation.save(SavedFileName, resources=INLINE, title=TitleHTML)       
+SplitOutput.SavePresentation(Presentation, SavedFileName, SplitOutputMode, resources=INLINE, title=TitleHTML)       
 
@@ -49,30 +49,37 @@
 
 
 import panel
-import base64
 import os
 import sys
 
+# shared build tools are kept in the BuildTools directory of the repository
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'BuildTools'))
+import AssetCache
+import ImageOptimizer
+import LazyTabs
+import SplitOutput
+import StreamedAssets
+
 EmbedVideo = False
 if len(sys.argv)>1:
     EmbedVideo = 'EmbedVideo' in sys.argv[1:]
 
+LazyTabMode = 'EagerTabs' not in sys.argv[1:]
+SplitOutputMode = 'SplitOutput' in sys.argv[1:]
+
 ImageDir = 'Images'
 CommonResourceDir = 'https://jacob-barhak.github.io/CommonResources/'
 
 def CovertFileToData(FileName):
     "Convert file to data that can be used in html"
-    DataFile = open(FileName,'rb')
-    Data = DataFile.read()
-    DataFile.close()
-    EncodedData=base64.b64encode(Data)
+    EncodedData = AssetCache.EncodeFile(FileName)
     return EncodedData
     
 
 def ConstractImageLinkAnchor(Link, ImageFileName, Text, Width):
-    'Constructs html to describe the png image and link it'
-    EncodedImage=  CovertFileToData (ImageDir + os.sep+ImageFileName)
-    RetStr = '<a title="%s" target="_blank" href="%s"><img src="data:image/png;base64,%s" alt="%s" width="%i"/> </a>'%(Text,Link,EncodedImage,Text,Width)
+    'Constructs html to describe the image and link it'
+    (ImageType, EncodedImage) = ImageOptimizer.EncodeImage(ImageDir+os.sep+ImageFileName, Width)
+    RetStr = '<a title="%s" target="_blank" href="%s"><img src="data:%s;base64,%s" alt="%s" width="%i"/> </a>'%(Text,Link,ImageType,EncodedImage,Text,Width)
     return RetStr
 
 
@@ -87,7 +94,8 @@ def ObjectInlineHTML(ExtrnalFileName,Width=1200,Height=700):
 def VideoInlineHTML(ExtrnalFileName,Width=1200,Height=700, EmbedVideo = EmbedVideo):
     'Encodes html from a file into video'
     if EmbedVideo:
-        ExtrnalData = CovertFileToData(ExtrnalFileName)
+        # the encoded video is streamed into the file when the presentation is saved
+        ExtrnalData = StreamedAssets.StreamedData(ExtrnalFileName)
         RetStr = '<Video width="%i" height="%i" controls>   <source src="%s" type="video/mp4">  Warning:%s could not be included! </Video>'%(Width, Height, 'data:video/mp4;base64,'+ExtrnalData,ExtrnalFileName)
     else:
         RetStr = '<Video width="%i" height="%i" controls>   <source src="%s" type="video/mp4">  Warning:%s could not be included! </Video>'%(Width, Height, ExtrnalFileName,ExtrnalFileName)
@@ -543,7 +551,12 @@ Thanks to Matthew Rocklin for dask support.
                
 TitleHTML = 'MODSIM World 2019 Presentation: Population Disease Occurrence Models Using Evolutionary Computation'
 
-SlideSelectorTab = panel.layout.Tabs (
+SavedFileName = 'Presentation_MODSIM_2019.html'
+PayloadDir = None
+if SplitOutputMode:
+    PayloadDir = SplitOutput.PayloadDir(SavedFileName)
+
+SlideSelectorTab = LazyTabs.Tabs (
                                         ('Problem' , Section0Problem),
                                         ('Definitions' , Section0Definitions),
                                         ('Analytical', Section0AnalyticalSolution),
@@ -556,6 +569,8 @@ SlideSelectorTab = panel.layout.Tabs (
                                         ('References' , Section0References),
                                         ('Acknowledgments' , Section0Acknowledgments),
                                         ('Reproducibility', Section0Reproducibility),
+                                        lazy = LazyTabMode,
+                                        payload_dir = PayloadDir,
                                       )
 
 Section0 = panel.Column(Section0Header, SlideSelectorTab)
@@ -563,6 +578,6 @@ Section0 = panel.Column(Section0Header, SlideSelectorTab)
 # The following line was changed in the new version to save resources online
 # Section0.save('Presentation_MODSIM_2019.html')
 from bokeh.resources import INLINE
-Section0.save('Presentation_MODSIM_2019.html', resources=INLINE)
+SplitOutput.SavePresentation(Section0, SavedFileName, SplitOutputMode, resources=INLINE)
 
 
@@ -38,7 +38,6 @@
 import bokeh
 import holoviews
 import panel
-import base64
 import os
 import sys
 from bokeh.resources import INLINE
@@ -46,6 +45,15 @@ from bokeh.palettes import Category20
 from bokeh.models import HoverTool
 from bokeh.models import CustomJSHover
 
+# shared build tools are kept in the BuildTools directory of the repository
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'BuildTools'))
+import AssetCache
+import ImageOptimizer
+import LazyTabs
+import SplitOutput
+import StreamedAssets
+import TypedColumns
+
 
 holoviews.extension('bokeh')
 panel.extension(safe_embed=True)
@@ -55,6 +63,9 @@ LocalFiles = True
 if len(sys.argv)>1:
     EmbedVideo = 'EmbedVideo' in sys.argv[1:]
     LocalFiles = 'LocalFiles' in sys.argv[1:]
+
+LazyTabMode = 'EagerTabs' not in sys.argv[1:]
+SplitOutputMode = 'SplitOutput' in sys.argv[1:]
     
 Width = 1100
 
@@ -66,16 +77,13 @@ ResourceDir = 'MSM_IMAG2020'
 
 def CovertFileToData(FileName):
     "Convert file to data that can be used in html"
-    DataFile = open(FileName,'rb')
-    Data = DataFile.read()
-    DataFile.close()
-    EncodedData=base64.b64encode(Data)
+    EncodedData = AssetCache.EncodeFile(FileName)
     return EncodedData
     
 def ConstractImageLinkAnchor(Link, ImageFileName, Text, Width):
-    'Constructs html to describe the png image and link it'
-    EncodedImage=  CovertFileToData (ImageDir+os.sep+ImageFileName)
-    RetStr = '<a title="%s" target="_blank" href="%s"><img src="data:image/png;base64,%s" alt="%s" width="%i"/> </a>'%(Text,Link,EncodedImage,Text,Width)
+    'Constructs html to describe the image and link it'
+    (ImageType, EncodedImage) = ImageOptimizer.EncodeImage(ImageDir+os.sep+ImageFileName, Width)
+    RetStr = '<a title="%s" target="_blank" href="%s"><img src="data:%s;base64,%s" alt="%s" width="%i"/> </a>'%(Text,Link,ImageType,EncodedImage,Text,Width)
     return RetStr
 
 def ObjectInlineHTML(ExtrnalFileName,Width=Width,Height=700):
@@ -86,7 +94,8 @@ def ObjectInlineHTML(ExtrnalFileName,Width=Width,Height=700):
 def VideoInlineHTML(ExtrnalFileName,Width=Width,Height=700, EmbedVideo = EmbedVideo):
     'Encodes html from a file into video'
     if EmbedVideo:
-        ExtrnalData = CovertFileToData(ExtrnalFileName)
+        # the encoded video is streamed into the file when the presentation is saved
+        ExtrnalData = StreamedAssets.StreamedData(ExtrnalFileName)
         RetStr = '<Video width="%i" height="%i" controls>   <source src="%s" type="video/mp4">  Warning:%s could not be included! </Video>'%(Width, Height, 'data:video/mp4;base64,'+ExtrnalData,ExtrnalFileName)
     else:
         RetStr = '<Video width="%i" height="%i" controls>   <source src="%s" type="video/mp4">  Warning:%s could not be included! </Video>'%(Width, Height, ExtrnalFileName,ExtrnalFileName)
@@ -232,6 +241,7 @@ def SaveFile(FileName, PlotObject, Title):
     if FileName != '':
         print (' saving using panel and INLINE the file: ' + FileName)          
         SaveObject = panel.pane.HoloViews(PlotObject)
+        TypedColumns.ReportListColumns(SaveObject.get_root(), FileName)
         SaveObject.save(FileName, resources=INLINE, title = Title, embed=True)
     else:
         print ('Skipping Save since no file was provided')
@@ -281,7 +291,10 @@ def GenerateHistoryPlots(Width,Height):
                 BaseList = [ ( (RunningYear, VerticalDimension), Value) if RunningYear<=Year else ((RunningYear, VerticalDimension), 0)  for (RunningYear,Value) in zip(Years , Data[VerticalDimension]) ]
                 DimDict = dict( BaseList)
                 BarsDict.update(DimDict)
-            BasePlotsOvelayed = holoviews.Bars(BarsDict, kdims=['Year','Category'], vdims=['Count'])
+            # counts are passed as a typed array rather than a list of numbers
+            BarsItems = list(BarsDict.items())
+            BarsColumns = ([Key[0] for (Key, Value) in BarsItems], [Key[1] for (Key, Value) in BarsItems], TypedColumns.NarrowestArray([Value for (Key, Value) in BarsItems]))
+            BasePlotsOvelayed = holoviews.Bars(BarsColumns, kdims=['Year','Category'], vdims=['Count'])
             Title =  Innovations[Year].format(Year)
             BasePlotsOvelayedWithOpts = BasePlotsOvelayed.opts (xlim = HorizontalLimits, ylim = (0, MaxY*1.2), tools = [MyHover1], toolbar=None, default_tools=[], width=Width-400, height=Height, xrotation= 90, stacked = IsStackable, clone = IsStackable, title = Title, legend_position='right')
             MergedPlot = BasePlotsOvelayedWithOpts
@@ -409,14 +422,20 @@ Section5ChronologyFigure = panel.panel(ConstractImageLinkAnchor('https://en.wiki
 
 Section5 =  panel.Column(Section5Summary, Section5SubHeader2, Section5ChronologyFigure, margin = (0,0,0,0))
 
-SectionSelectorTab = panel.layout.Tabs (
+PayloadDir = None
+if SplitOutputMode:
+    PayloadDir = SplitOutput.PayloadDir(SavedFileName)
+
+SectionSelectorTab = LazyTabs.Tabs (
                                         ('Abstract',Section0),
                                         ('What is New?', Section1),
                                         ('Results', Section2),
                                         ('Additional Information', Section5),
                                         margin = (0,0,0,0), 
+                                        lazy = LazyTabMode,
+                                        payload_dir = PayloadDir,
                                         )
                                         
 Presentation = panel.Column(PresentationHeader, SectionSelectorTab)
-Presentation.save(SavedFileName, resources=INLINE, title=TitleHTML)       
+SplitOutput.SavePresentation(Presentation, SavedFileName, SplitOutputMode, resources=INLINE, title=TitleHTML)       
 
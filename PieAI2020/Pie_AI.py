@@ -41,19 +41,37 @@
 
 import bokeh
 import panel
-import base64
 import os
 import sys
-import collections
 import holoviews
-import numpy
-import pickle
 from bokeh.resources import INLINE
 from matplotlib.cm import  PuBu, PuRd, Greens
 
+# shared build tools are kept in the BuildTools directory of the repository
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'BuildTools'))
+import AssetCache
+import ColumnarStore
+import FrameDeltas
+import GridPlots
+import HistogramEngine
+import ImageOptimizer
+import LazyTabs
+import MatrixImage
+import QuantizedImage
+import SparseStore
+import SplitOutput
+import StreamedAssets
+import TilePyramid
+
 EmbedVideo = False
 if len(sys.argv)>1:
     EmbedVideo = 'EmbedVideo' in sys.argv[1:]
+
+LazyTabMode = 'EagerTabs' not in sys.argv[1:]
+SplitOutputMode = 'SplitOutput' in sys.argv[1:]
+ConsolidatedPlotMode = 'ConsolidatedPlots' in sys.argv[1:]
+QuantizedMatrixMode = 'QuantizedMatrices' in sys.argv[1:]
+FrameDeltaMode = 'FrameDeltas' in sys.argv[1:]
     
 Width = 1100
 
@@ -63,16 +81,13 @@ ExternalResources = 'https://jacob-barhak.github.io/PosterIMAG2019Resources/'
 
 def CovertFileToData(FileName):
     "Convert file to data that can be used in html"
-    DataFile = open(FileName,'rb')
-    Data = DataFile.read()
-    DataFile.close()
-    EncodedData=base64.b64encode(Data)
+    EncodedData = AssetCache.EncodeFile(FileName)
     return EncodedData
     
 def ConstractImageLinkAnchor(Link, ImageFileName, Text, Width):
-    'Constructs html to describe the png image and link it'
-    EncodedImage=  CovertFileToData (ImageDir+os.sep+ImageFileName)
-    RetStr = '<a title="%s" target="_blank" href="%s"><img src="data:image/png;base64,%s" alt="%s" width="%i"/> </a>'%(Text,Link,EncodedImage,Text,Width)
+    'Constructs html to describe the image and link it'
+    (ImageType, EncodedImage) = ImageOptimizer.EncodeImage(ImageDir+os.sep+ImageFileName, Width)
+    RetStr = '<a title="%s" target="_blank" href="%s"><img src="data:%s;base64,%s" alt="%s" width="%i"/> </a>'%(Text,Link,ImageType,EncodedImage,Text,Width)
     return RetStr
 
 def ObjectInlineHTML(ExtrnalFileName,Width=Width,Height=700):
@@ -83,7 +98,8 @@ def ObjectInlineHTML(ExtrnalFileName,Width=Width,Height=700):
 def VideoInlineHTML(ExtrnalFileName,Width=Width,Height=700, EmbedVideo = EmbedVideo):
     'Encodes html from a file into video'
     if EmbedVideo:
-        ExtrnalData = CovertFileToData(ExtrnalFileName)
+        # the encoded video is streamed into the file when the presentation is saved
+        ExtrnalData = StreamedAssets.StreamedData(ExtrnalFileName)
         RetStr = '<Video width="%i" height="%i" controls>   <source src="%s" type="video/mp4">  Warning:%s could not be included! </Video>'%(Width, Height, 'data:video/mp4;base64,'+ExtrnalData,ExtrnalFileName)
     else:
         RetStr = '<Video width="%i" height="%i" controls>   <source src="%s" type="video/mp4">  Warning:%s could not be included! </Video>'%(Width, Height, ExtrnalFileName,ExtrnalFileName)
@@ -186,28 +202,24 @@ Section1WebKeyElements = panel.Column(Section1WebKeyPoints, Section1WebSiteStati
 
 def GenerateProximityMap():
     "Generate the proximity map"
-    DataFile = open(DataDir+os.sep+'UnitProximityHeatMap_Data.pckl','rb')
-    Data = pickle.load(DataFile)
-    DataFile.close()
+    if TilePyramid.Exists(DataDir+os.sep+'UnitProximityPyramid'):
+        # all units are shown from the tiles built by TilePyramid.py that are served next to the presentation
+        PyramidFigure = TilePyramid.PyramidFigure(DataDir+os.sep+'UnitProximityPyramid', DataDir+'/UnitProximityPyramid', 'Proximity Matrix of All Units', ["Unit 1", "Unit 2", "Proximity"], 600, 600)
+        return panel.pane.Bokeh(PyramidFigure, width=600, height=600)
+    # the proximities are kept as a sparse matrix, see SparseStore.py
+    (ColumnNames, RowNames, Proximities) = SparseStore.LoadMatrix(DataDir, 'UnitProximityHeatMap_Data.pckl')
     holoviews.extension('bokeh')
-    UnitHeatMap = holoviews.HeatMap(Data).opts(title = 'Zoom on Proximity Matrix Before Clustering')
-    Hover = bokeh.models.HoverTool(
-                        tooltips=[
-                                    ("Unit 1", "@x"),
-                                    ("Unit 2", "@y"),
-                                    ("Proximity", "@z"),
-                                 ]
-                        )
-    UnitHeatMap.opts(tools=[Hover], cmap = 'BuPu' , colorbar=True, toolbar=None, width=600, height=600, xrotation=90, ticks_text_font_size = 5, labelled=[])
+    # drawn as one image whose hover finds the units in an index, see MatrixImage.py
+    UnitHeatMap = MatrixImage.NamedImage(ColumnNames, RowNames, Proximities.Dense(), ["Unit 1", "Unit 2", "Proximity"]).opts(title = 'Zoom on Proximity Matrix Before Clustering')
+    UnitHeatMap.opts(cmap = 'BuPu' , colorbar=True, toolbar=None, width=600, height=600, xrotation=90, fontsize={'ticks': 5}, labelled=[])
     PanelOut = panel.pane.HoloViews(UnitHeatMap, width=600, height=600)
     return PanelOut
 
 
 def LoadHoloviewsComponent(FileName, Title, ColorMap, PlotHeight, PlotWidth):
     "load larger matrix components and build an object with options"
-    DataFile = open(DataDir+os.sep+FileName,'rb')
-    HoloviewsObjectTuple = pickle.load(DataFile)
-    DataFile.close()
+    # converted objects are memory mapped from their columnar store
+    HoloviewsObjectTuple = ColumnarStore.LoadObject(DataDir+os.sep+FileName)
     if Title != None :
         HoloviewsObject = HoloviewsObjectTuple
         RevisedObject = HoloviewsObjectTuple.opts(cmap=ColorMap, title = Title, xaxis=None, yaxis=None,  height=PlotHeight, width=PlotWidth, tools=['hover'], toolbar = None, axiswise=True)
@@ -220,6 +232,12 @@ def LoadHoloviewsComponent(FileName, Title, ColorMap, PlotHeight, PlotWidth):
         HoloviewsObjectName, HoloviewsObject = HoloviewsObjectTuple
         RevisedObject = HoloviewsObject.redim.label(x='Neural Unit Number ',y='Time', z= 'Value' )
         RevisedObject.opts(cmap=ColorMap, title = 'Weight Matrix ' + HoloviewsObjectName, xaxis='top', yaxis='left', height=PlotHeight, width=PlotWidth, tools=['hover'], axiswise=True, toolbar = None)
+    if FrameDeltaMode and Title == None and ColorMap != None:
+        # weight histories are sent as their first row and 8 bit changes between rows
+        RevisedObject = FrameDeltas.DeltaElement(RevisedObject, FileName)
+    elif QuantizedMatrixMode and ColorMap != None:
+        # cells are sent as 8 bit codes decoded by the hover tool
+        RevisedObject = QuantizedImage.QuantizedElement(RevisedObject, FileName)
     return RevisedObject
 
 Section1HeaderNLP = panel.panel("""# Unit Proximity with NLP + Clustering
@@ -330,11 +348,10 @@ def GeneratePlot(InputFile, Title, Footer):
                  ('Distance Best Metric',False),    
                  ('Distance Combined Metric',False),   
                   ]
-    PredictionQualities = collections.defaultdict(list)
-    TempFile = open(DataDir+os.sep+InputFile,'rb')
-    (PredictionQualities) = pickle.load(TempFile)
-    TempFile.close()
         
+    # the histograms of the grid are computed together from the prediction
+    # qualities and cached across builds, see HistogramEngine.py
+    Histograms = HistogramEngine.LoadHistogramGrid(DataDir, InputFile, [(IsValidationPass,PassTypeNumber) for IsValidationPass in range(len(PhaseTexts)) for PassTypeNumber in range(len(PassTypeTexts))], PlotTypes, ShowStatisticsForOnlyThisNumberOfFirstItems)
     for (IsValidationPass, PhaseText) in enumerate(PhaseTexts):
         for (PassTypeNumber, PassTypeText) in enumerate(PassTypeTexts):
             for (PlotTypeEnum,(PlotTypeName,IsPlotTypeBoolean)) in enumerate(PlotTypes):  
@@ -349,20 +366,19 @@ def GeneratePlot(InputFile, Title, Footer):
                     LabelsX[0] = (0,'Exact')
                     LabelsX[-1] = (NumberOfCategories,str(NumberOfCategories)+'+')
 
-                Values = [min(Entry[PlotTypeEnum]+0,NumberOfCategories) for Entry in PredictionQualities[(IsValidationPass,PassTypeNumber)] if Entry !=None] 
-                Frequences, Edges = numpy.histogram(Values, bins = Bins, density = True)
-                if IsPlotTypeBoolean:
-                    FrequencesToUse = Frequences
-                else:
-                    FrequencesToUse = [ sum(Frequences[:(Enum+1)]) for Enum in range(len(Frequences))] 
+                (Edges, FrequencesToUse) = Histograms[((IsValidationPass,PassTypeNumber), PlotTypeName)]
                 HistogramShortTitle = holoviews.Histogram((Edges, FrequencesToUse)).redim.label(x='Quality', Frequency = ['Cumulative Proportion','Proportion'][IsPlotTypeBoolean]).opts( title = PlotTypeName, tools = ['hover'], ylim =(0,1), color = ['Blue','Red'][IsPlotTypeBoolean], height=135 , width=230-100*IsPlotTypeBoolean, toolbar = None, fontsize={'title': 8, 'labels': 8, 'xticks': 6, 'yticks': 6}, xticks=LabelsX, shared_axes=False)    
                 PlotsDict[(PhaseText,PassTypeText,PlotTypeName)] = HistogramShortTitle
 
-    PlotList = [  (PhaseText + ' ' + PassTypeText  , [ panel.pane.HoloViews(PlotsDict[(PhaseText,PassTypeText,PlotTypeName)]) for (PlotTypeName,IsPlotTypeBoolean) in (PlotTypes)]) for PhaseText in PhaseTexts for PassTypeText in PassTypeTexts ] 
+    PlotList = [  (PhaseText + ' ' + PassTypeText  , [ PlotsDict[(PhaseText,PassTypeText,PlotTypeName)] for (PlotTypeName,IsPlotTypeBoolean) in (PlotTypes)]) for PhaseText in PhaseTexts for PassTypeText in PassTypeTexts ] 
     CombinedList = [panel.panel(Title,height=50, margin = (0,0,0,0))]
-    for (PlotTitle,PlotRows) in PlotList:
-        CombinedList.append(panel.panel('#### '+PlotTitle,height=35, margin = (0,0,0,0)))
-        CombinedList.append(panel.Row(*PlotRows, margin = (0,0,0,0)))
+    if ConsolidatedPlotMode:
+        # one figure per plot type shows the row picked by a widget, see GridPlots.py
+        CombinedList.append(GridPlots.ConsolidatedRows(PlotList))
+    else:
+        for (PlotTitle,PlotRows) in PlotList:
+            CombinedList.append(panel.panel('#### '+PlotTitle,height=35, margin = (0,0,0,0)))
+            CombinedList.append(panel.Row(*[panel.pane.HoloViews(Plot) for Plot in PlotRows], margin = (0,0,0,0)))
     CombinedList.append(panel.panel(Footer,height=10, margin = (0,0,0,0)))
     ConstrcutedGrid = panel.Column(*CombinedList, margin = (0,0,0,0))
     return ConstrcutedGrid
@@ -461,7 +477,11 @@ Section6 =  panel.Column(Section6Summary,Section6AdditionalInfo, margin = (0,0,0
 
 
 
-SectionSelectorTab = panel.layout.Tabs (
+PayloadDir = None
+if SplitOutputMode:
+    PayloadDir = SplitOutput.PayloadDir(SavedFileName)
+
+SectionSelectorTab = LazyTabs.Tabs (
                                         ('Preface',Section0),
                                         ('Solution Outline', Section1),
 
@@ -471,8 +491,10 @@ SectionSelectorTab = panel.layout.Tabs (
                                         
                                         ('Summary', Section6),
                                         margin = (0,0,0,0), 
+                                        lazy = LazyTabMode,
+                                        payload_dir = PayloadDir,
                                         )
                                         
 Presentation = panel.Column(PresentationHeader, SectionSelectorTab)
-Presentation.save(SavedFileName, resources=INLINE, title=TitleHTML)       
+SplitOutput.SavePresentation(Presentation, SavedFileName, SplitOutputMode, resources=INLINE, title=TitleHTML)       
 
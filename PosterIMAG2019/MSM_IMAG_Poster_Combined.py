@@ -40,19 +40,24 @@
 
 import panel
 import bokeh
-import base64
 import os
+import sys
+
+# shared build tools are kept in the BuildTools directory of the repository
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'BuildTools'))
+import ImageOptimizer
+import LazyTabs
+import SharedImages
+
+LazyTabMode = 'EagerTabs' not in sys.argv[1:]
 
 ResourceDir = 'Resources'
 ExternalResources = 'https://jacob-barhak.github.io/PosterIMAG2019Resources/'
 
 def ConstractImageLinkAnchor(Link, ImageFileName, Text, Width):
-    'Constructs html to describe the png image and link it'
-    ImageFile = open(ResourceDir+os.sep+ImageFileName,'rb')
-    ImageData = ImageFile.read()
-    ImageFile.close()
-    EncodedImage=base64.b64encode(ImageData)
-    RetStr = '<a title="%s" target="_blank" href="%s"><img src="data:image/png;base64,%s" alt="%s" width="%i"/> </a>'%(Text,Link,EncodedImage,Text,Width)
+    'Constructs html to describe the image and link it'
+    (ImageType, EncodedImage) = ImageOptimizer.EncodeImage(ResourceDir+os.sep+ImageFileName, Width)
+    RetStr = '<a title="%s" target="_blank" href="%s"><img src="data:%s;base64,%s" alt="%s" width="%i"/> </a>'%(Text,Link,ImageType,EncodedImage,Text,Width)
     return RetStr
 
 
@@ -274,14 +279,17 @@ Poster2 = panel.Column(Poster2Title, Poster2Abstract, Poster2KeyElements, Poster
 
 TitleHTML = 'MSM/IMAG 2019 meeting Interactive Poster'
 
-PosterSelectorTab = panel.layout.Tabs (
+PosterSelectorTab = LazyTabs.Tabs (
                                         ('Poster 1: The Reference Model is the Most Validated Diabetes Cardiovascular Model Known',Poster1),
                                         ('Poster 2: Clinical Unit Mapping for Standardization of ClinicalTrials.Gov',Poster2),
+                                        lazy = LazyTabMode,
                                       )
 
 DocumentForOutput = PosterSelectorTab._get_root(BokehDocument)
 
 Html = bokeh.embed.file_html(DocumentForOutput, bokeh.resources.CDN, TitleHTML)
+Html = LazyTabs.AddItemScripts(Html, PosterSelectorTab)
+Html = SharedImages.DeduplicateImages(Html)
 
 OutFile = open('InteractivePoster_MSM_IMAG_2019.html','w')
 OutFile.write(Html)
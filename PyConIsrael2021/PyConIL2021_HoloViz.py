@@ -28,7 +28,6 @@
 
 import bokeh
 import panel
-import base64
 import os
 import sys
 import collections
@@ -41,6 +40,10 @@ import math
 from bokeh.resources import INLINE
 from matplotlib.cm import  PuBu, PuRd, Greens
 
+# shared build tools are kept in the BuildTools directory of the repository
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'BuildTools'))
+import AssetCache
+
 
 default_width = 1100
 
@@ -49,10 +52,7 @@ data_dir = 'Data'
 
 def convert_file_to_data(file_name):
     "Convert file to data that can be used in html"
-    data_file = open(file_name,'rb')
-    data = data_file.read()
-    data_file.close()
-    return base64.b64encode(data).decode()
+    return AssetCache.EncodeFile(file_name)
 
 def constract_image_link_anchor(link, image_file_name, text, width):
     "Constructs html to describe the png image and link it"
@@ -46,14 +46,24 @@
 
 import bokeh
 import panel
-import base64
 import os
 import sys
 
+# shared build tools are kept in the BuildTools directory of the repository
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'BuildTools'))
+import AssetCache
+import ImageOptimizer
+import LazyTabs
+import SplitOutput
+import StreamedAssets
+
 EmbedVideo = False
 if len(sys.argv)>1:
     EmbedVideo = 'EmbedVideo' in sys.argv[1:]
 
+LazyTabMode = 'EagerTabs' not in sys.argv[1:]
+SplitOutputMode = 'SplitOutput' in sys.argv[1:]
+
 ImageDir = 'Images'
 CommonResourceDir = 'https://jacob-barhak.github.io/CommonResources/'
 ExternalResourcesIMAG2019 = 'https://jacob-barhak.github.io/PosterIMAG2019Resources/'
@@ -62,17 +72,14 @@ ExternalResourcesIMAG2019 = 'https://jacob-barhak.github.io/PosterIMAG2019Resour
 
 def CovertFileToData(FileName):
     "Convert file to data that can be used in html"
-    DataFile = open(FileName,'rb')
-    Data = DataFile.read()
-    DataFile.close()
-    EncodedData=base64.b64encode(Data)
+    EncodedData = AssetCache.EncodeFile(FileName)
     return EncodedData
     
 
 def ConstractImageLinkAnchor(Link, ImageFileName, Text, Width):
-    'Constructs html to describe the png image and link it'
-    EncodedImage=  CovertFileToData (ImageDir+os.sep+ImageFileName)
-    RetStr = '<a title="%s" target="_blank" href="%s"><img src="data:image/png;base64,%s" alt="%s" width="%i"/> </a>'%(Text,Link,EncodedImage,Text,Width)
+    'Constructs html to describe the image and link it'
+    (ImageType, EncodedImage) = ImageOptimizer.EncodeImage(ImageDir+os.sep+ImageFileName, Width)
+    RetStr = '<a title="%s" target="_blank" href="%s"><img src="data:%s;base64,%s" alt="%s" width="%i"/> </a>'%(Text,Link,ImageType,EncodedImage,Text,Width)
     return RetStr
 
 
@@ -86,7 +93,8 @@ def ObjectInlineHTML(ExtrnalFileName,Width=1200,Height=700):
 def VideoInlineHTML(ExtrnalFileName,Width=1200,Height=700, EmbedVideo = EmbedVideo):
     'Encodes html from a file into video'
     if EmbedVideo:
-        ExtrnalData = CovertFileToData(ExtrnalFileName)
+        # the encoded video is streamed into the file when the presentation is saved
+        ExtrnalData = StreamedAssets.StreamedData(ExtrnalFileName)
         RetStr = '<Video width="%i" height="%i" controls>   <source src="%s" type="video/mp4">  Warning:%s could not be included! </Video>'%(Width, Height, 'data:video/mp4;base64,'+ExtrnalData,ExtrnalFileName)
     else:
         RetStr = '<Video width="%i" height="%i" controls>   <source src="%s" type="video/mp4">  Warning:%s could not be included! </Video>'%(Width, Height, ExtrnalFileName,ExtrnalFileName)
@@ -497,13 +505,20 @@ Section5 =  Section5SlideSelectorTab
 
 TitleHTML = 'SISO ENGTAM 2019 presentation by Jacob Barhak'
 
-SectionSelectorTab = panel.layout.Tabs (
+SavedFileName = 'Presentation_SISO_ENGTAM2019.html'
+PayloadDir = None
+if SplitOutputMode:
+    PayloadDir = SplitOutput.PayloadDir(SavedFileName)
+
+SectionSelectorTab = LazyTabs.Tabs (
                                         ('Preface',Section0),
                                         ('(1) Modeling Populations',Section2),
                                         ('(2) The Reference Model',Section3),
                                         ('(3) ClinicalUnitMapping.com',Section4),
                                         ('(4) Summary',Section5),
 										margin = (0,0,0,0),
+                                        lazy = LazyTabMode,
+                                        payload_dir = PayloadDir,
                                         )
    
 
@@ -511,5 +526,5 @@ SectionSelectorTab = panel.layout.Tabs (
                                
                                         
 Presentation = panel.Column(PresentationHeader, SectionSelectorTab)
-Presentation.save('Presentation_SISO_ENGTAM2019.html')       
+SplitOutput.SavePresentation(Presentation, SavedFileName, SplitOutputMode)       
 
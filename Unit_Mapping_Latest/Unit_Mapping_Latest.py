@@ -39,10 +39,27 @@ from matplotlib.cm import  PuBu, PuRd, Greens
 import re
 from string import Template
 
+# shared build tools are kept in the BuildTools directory of the repository
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'BuildTools'))
+import AssetCache
+import ImageOptimizer
+import BokehEmbed
+import DataStore
+import GridPlots
+import HistogramEngine
+import LazyTabs
+import SplitOutput
+import StreamedAssets
+
 EmbedVideo = False
 if len(sys.argv)>1:
     EmbedVideo = 'EmbedVideo' in sys.argv[1:]
     
+SharedBokehJS = 'StandaloneResources' not in sys.argv[1:]
+LazyTabMode = 'EagerTabs' not in sys.argv[1:]
+SplitOutputMode = 'SplitOutput' in sys.argv[1:]
+ConsolidatedPlotMode = 'ConsolidatedPlots' in sys.argv[1:]
+
 Width = 1100
 
 ImageDir = 'Images'
@@ -53,16 +70,13 @@ ResourceDir = 'Resources'
 
 def CovertFileToData(FileName):
     "Convert file to data that can be used in html"
-    DataFile = open(FileName,'rb')
-    Data = DataFile.read()
-    DataFile.close()
-    EncodedData=base64.b64encode(Data)
+    EncodedData = AssetCache.EncodeFile(FileName)
     return EncodedData
     
 def ConstractImageLinkAnchor(Link, ImageFileName, Text, Width):
-    'Constructs html to describe the png image and link it'
-    EncodedImage=  CovertFileToData (ImageDir+os.sep+ImageFileName)
-    RetStr = '<a title="%s" target="_blank" href="%s"><img src="data:image/png;base64,%s" alt="%s" width="%i"/> </a>'%(Text,Link,EncodedImage,Text,Width)
+    'Constructs html to describe the image and link it'
+    (ImageType, EncodedImage) = ImageOptimizer.EncodeImage(ImageDir+os.sep+ImageFileName, Width)
+    RetStr = '<a title="%s" target="_blank" href="%s"><img src="data:%s;base64,%s" alt="%s" width="%i"/> </a>'%(Text,Link,ImageType,EncodedImage,Text,Width)
     return RetStr
 
 def ObjectInlineHTML(ExtrnalFileName,Width=Width,Height=700):
@@ -70,13 +84,19 @@ def ObjectInlineHTML(ExtrnalFileName,Width=Width,Height=700):
     DataFile = open(ExtrnalFileName,'rb')
     Data = DataFile.read()
     DataFile.close()
+    if SharedBokehJS:
+        # render the bokeh document of the file using the BokehJS of the presentation
+        EmbeddedData = BokehEmbed.EmbedBokehDocument(Data, ExtrnalFileName)
+        if EmbeddedData is not None:
+            Data = EmbeddedData
     Figure_4 = panel.pane.HTML(Data, width=Width, height=Height, margin = (0,0,0,0))
     return Figure_4
 
 def VideoInlineHTML(ExtrnalFileName,Width=Width,Height=700, EmbedVideo = EmbedVideo):
     'Encodes html from a file into video'
     if EmbedVideo:
-        ExtrnalData = CovertFileToData(ExtrnalFileName)
+        # the encoded video is streamed into the file when the presentation is saved
+        ExtrnalData = StreamedAssets.StreamedData(ExtrnalFileName)
         RetStr = '<Video width="%i" height="%i" controls>   <source src="%s" type="video/mp4">  Warning:%s could not be included! </Video>'%(Width, Height, 'data:video/mp4;base64,'+ExtrnalData,ExtrnalFileName)
     else:
         RetStr = '<Video width="%i" height="%i" controls>   <source src="%s" type="video/mp4">  Warning:%s could not be included! </Video>'%(Width, Height, ExtrnalFileName,ExtrnalFileName)
@@ -371,12 +391,11 @@ def GeneratePlot(InputFile, PhaseTexts, PassTypeTexts, Title, Footer, TitleFunc
                  ('Infer Close',True),  
                  ('How Close?',False),   
                   ]
-    PredictionQualities = collections.defaultdict(list)
-    TempFile = open(DataDir+os.sep+InputFile,'rb')
-    (PredictionQualities) = pickle.load(TempFile)
-    TempFile.close()
     PlotTitleTemplate = Template(TitleFunc)
         
+    # the histograms of the grid are computed together from the prediction
+    # qualities and cached across builds, see HistogramEngine.py
+    Histograms = HistogramEngine.LoadHistogramGrid(DataDir, InputFile, [(PhaseText,PassTypeText) for PhaseText in PhaseTexts for PassTypeText in PassTypeTexts], PlotTypes, ShowStatisticsForOnlyThisNumberOfFirstItems)
     for (IsValidationPass, PhaseText) in enumerate(PhaseTexts):
         for (PassTypeNumber, PassTypeText) in enumerate(PassTypeTexts):
             for (PlotTypeEnum,(PlotTypeName,IsPlotTypeBoolean)) in enumerate(PlotTypes):  
@@ -391,22 +410,21 @@ def GeneratePlot(InputFile, PhaseTexts, PassTypeTexts, Title, Footer, TitleFunc
                     LabelsX[0] = (0,'Exact')
                     LabelsX[-1] = (NumberOfCategories,str(NumberOfCategories)+'+')
 
-                Values = [min(Entry[PlotTypeEnum]+0,NumberOfCategories) for Entry in PredictionQualities[(PhaseText,PassTypeText)] if Entry !=None] 
-                Frequences, Edges = numpy.histogram(Values, bins = Bins, density = True)
-                if IsPlotTypeBoolean:
-                    FrequencesToUse = Frequences
-                else:
-                    FrequencesToUse = [ sum(Frequences[:(Enum+1)]) for Enum in range(len(Frequences))] 
+                (Edges, FrequencesToUse) = Histograms[((PhaseText,PassTypeText), PlotTypeName)]
                 HistogramShortTitle = holoviews.Histogram((Edges, FrequencesToUse)).redim.label(x='Quality', Frequency = ['Cumulative Proportion','Proportion'][IsPlotTypeBoolean]).opts( title = PlotTypeName, tools = ['hover'], ylim =(0,1), xlim=( Bins[0], Bins[-1]) , color = ['Blue','Red'][IsPlotTypeBoolean], height=130 , width=650-520*IsPlotTypeBoolean, toolbar = None, default_tools = [], fontsize={'title': 8, 'labels': 8, 'xticks': 6, 'yticks': 6}, xticks=LabelsX, shared_axes=False)
                 PlotsDict[(PhaseText,PassTypeText,PlotTypeName)] = HistogramShortTitle
 
-    PlotList = [ (PlotTitleTemplate.safe_substitute({'PhaseText': PhaseText, 'PassTypeText': PassTypeText}) , [ panel.pane.HoloViews(PlotsDict[(PhaseText,PassTypeText,PlotTypeName)]) for (PlotTypeName,IsPlotTypeBoolean) in (PlotTypes)]) for PhaseText in PhaseTexts for PassTypeText in PassTypeTexts ] 
+    PlotList = [ (PlotTitleTemplate.safe_substitute({'PhaseText': PhaseText, 'PassTypeText': PassTypeText}) , [ PlotsDict[(PhaseText,PassTypeText,PlotTypeName)] for (PlotTypeName,IsPlotTypeBoolean) in (PlotTypes)]) for PhaseText in PhaseTexts for PassTypeText in PassTypeTexts ] 
     CombinedList = []
     if Title:
         CombinedList = [panel.panel(Title,height=25, margin = (0,0,0,0))]
-    for (PlotTitle,PlotRows) in PlotList:
-        CombinedList.append(panel.panel('#### '+PlotTitle,height=30, margin = (0,0,0,0)))
-        CombinedList.append(panel.Row(*PlotRows, margin = (0,0,0,0)))
+    if ConsolidatedPlotMode:
+        # one figure per plot type shows the row picked by a widget, see GridPlots.py
+        CombinedList.append(GridPlots.ConsolidatedRows(PlotList))
+    else:
+        for (PlotTitle,PlotRows) in PlotList:
+            CombinedList.append(panel.panel('#### '+PlotTitle,height=30, margin = (0,0,0,0)))
+            CombinedList.append(panel.Row(*[panel.pane.HoloViews(Plot) for Plot in PlotRows], margin = (0,0,0,0)))
     if Footer:
         CombinedList.append(panel.panel(Footer,height=10, margin = (0,0,0,0)))
     ConstrcutedGrid = panel.Column(*CombinedList, margin = (0,0,0,0))
@@ -425,6 +443,7 @@ Section4SupervisedMachineLearningResults1Unique = GeneratePlot('Summary_stats_ne
 Section4SupervisedMachineLearningResults2Unique = GeneratePlot('Summary_stats_infer_only_units.pckl', [u'validate'], ['Unit only first unique'], 'Test accuracy considering all data within mapped clusters excluding CDISC / IEEE terminology - considering only unique inputs without repetition.', None, "All data $PassTypeText")
 Section4SupervisedMachineLearningResults3Unique = GeneratePlot('Summary_stats_infer_only_unit_context.pckl', [u'validate'], [u'Unit & Context first unique'], '', None, "All data $PassTypeText")
 Section4SupervisedMachineLearningResults4Unique = GeneratePlot('Summary_stats_infer_only_context.pckl', [u'validate'], [u'Context only first unique'], '', Section4SupervisedMachineLearningFooter, "All data $PassTypeText")
+print(DataStore.GetSharedCache().Report())
 
 
 Section4SupervisedMachineLearningValidation = panel.Column(Section4SupervisedMachineLearningResults2, Section4SupervisedMachineLearningResults3, Section4SupervisedMachineLearningResults4, margin = (0,0,0,0))
@@ -560,7 +579,11 @@ Section11 = panel.Row( Section11_1, panel.Column(Logos, Section11_2, ), margin =
 
 
 
-SectionSelectorTab = panel.layout.Tabs (
+PayloadDir = None
+if SplitOutputMode:
+    PayloadDir = SplitOutput.PayloadDir(SavedFileName)
+
+SectionSelectorTab = LazyTabs.Tabs (
                                         ('Preface',Section0),
                                         ('Solution Outline', Section1),
                                         ('Unsupervised Machine Learning', Section2),
@@ -572,8 +595,10 @@ SectionSelectorTab = panel.layout.Tabs (
                                         ('Summary', Section6),
                                         ('Acknowledgments', Section11),
                                         margin = (0,0,0,0), 
+                                        lazy = LazyTabMode,
+                                        payload_dir = PayloadDir,
                                         )
                                         
 Presentation = panel.Column(PresentationHeader, SectionSelectorTab)
-Presentation.save(SavedFileName, resources=INLINE, title=TitleHTML)       
+SplitOutput.SavePresentation(Presentation, SavedFileName, SplitOutputMode, resources=INLINE, title=TitleHTML)       
 